@@ -4,10 +4,12 @@
 """
 import sys
 import os
+import csv
+import time
 import pandas as pd
-from datetime import datetime, time
+import yaml
+from datetime import datetime
 import logging
-import glob
 from typing import List, Dict, Optional, Any
 
 # 添加项目路径
@@ -19,6 +21,14 @@ from src.data.data_fetcher import ShortTermDataFetcher
 from src.analyzer.time_pattern_analyzer import TimePatternAnalyzer
 from src.core.dynamic_sector_analyzer_v2 import OptimizedDynamicSectorAnalyzer
 from src.core.stock_filter import StockFilter
+from src.data.csv_writer import write_csv
+from src.data.json_writer import write_json
+from src.utils.results_files import find_latest_watchlist_file
+
+try:
+    import akshare as ak  # type: ignore
+except ImportError:
+    ak = None  # 实时行情兜底数据源，缺失时跳过
 
 # 配置日志
 logging.basicConfig(
@@ -28,10 +38,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 连续竞价时段（当日秒数，闭区间）：9:30-11:30、13:00-15:00
+TRADING_WINDOWS = (
+    (9 * 3600 + 30 * 60, 11 * 3600 + 30 * 60),
+    (13 * 3600, 15 * 3600),
+)
+
+
+def is_trading_time(now: datetime) -> bool:
+    """判断是否处于盘中交易时段（按秒比较整数，不构造 time 对象）"""
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
+    for start, end in TRADING_WINDOWS:
+        if start <= seconds <= end:
+            return True
+    return False
+
+
 def load_config():
     """加载配置文件"""
     try:
-        import yaml
         with open('config/sectors.yaml', 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     except FileNotFoundError:
@@ -46,43 +71,42 @@ def load_config():
         }
 
 
+def _to_float(value) -> float:
+    """CSV 单元格转浮点数，空值/非法值/NaN 记为 0"""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return v if v == v else 0.0
+
+
 def get_watchlist_from_file(results_dir: str = "results"):
     """从文件获取监控列表"""
     if not os.path.exists(results_dir):
         return []
     
     # 查找最新的分析结果
-    patterns = [
-        "recommended_stocks_*.csv",
-        "stocks_simple_*.csv",
-        "simple_recommendations_*.csv",
-        "recommendations_*.csv",
-    ]
-    
-    files = []
-    for pattern in patterns:
-        files.extend(glob.glob(os.path.join(results_dir, pattern)))
-    
-    if not files:
+    latest_file = find_latest_watchlist_file(results_dir)
+    if latest_file is None:
         return []
     
-    latest_file = max(files, key=os.path.getctime)
     logger.info(f"从文件加载监控列表: {os.path.basename(latest_file)}")
     
     try:
-        df = pd.read_csv(latest_file, encoding='utf-8-sig')
-        
+        # 推荐列表只有几十行，用 csv 模块逐行读取即可，无需构造 DataFrame
         watchlist = []
-        for _, row in df.iterrows():
-            symbol = str(row.get('symbol', '')).strip()
-            if symbol:
+        with open(latest_file, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get('symbol') or '').strip()
+                if not symbol:
+                    continue
                 watchlist.append({
                     'symbol': symbol,
-                    'name': str(row.get('name', '')).strip(),
-                    'sector_name': str(row.get('sector_name', row.get('sector', ''))).strip(),
-                    'score': float(row.get('total_score', 0)) if pd.notna(row.get('total_score')) else 0,
-                    'price': float(row.get('price', 0)) if pd.notna(row.get('price')) else 0,
-                    'change_pct': float(row.get('change_pct', 0)) if pd.notna(row.get('change_pct')) else 0
+                    'name': (row.get('name') or '').strip(),
+                    'sector_name': (row.get('sector_name') or row.get('sector') or '').strip(),
+                    'score': _to_float(row.get('total_score')),
+                    'price': _to_float(row.get('price')),
+                    'change_pct': _to_float(row.get('change_pct'))
                 })
         
         # 不截断，按文件内容全部加载（由调用方决定是否限制）
@@ -93,10 +117,11 @@ def get_watchlist_from_file(results_dir: str = "results"):
         return []
 
 
-def get_realtime_watchlist():
-    """获取实时监控列表"""
+def get_realtime_watchlist(data_fetcher: Optional[ShortTermDataFetcher] = None):
+    """获取实时监控列表（传入 data_fetcher 时复用其连接与缓存）"""
     try:
-        data_fetcher = ShortTermDataFetcher(rate_limit=0.5)
+        if data_fetcher is None:
+            data_fetcher = ShortTermDataFetcher(rate_limit=0.5)
         sector_analyzer = OptimizedDynamicSectorAnalyzer(data_fetcher)
         
         # 获取板块数据
@@ -136,35 +161,124 @@ def get_realtime_watchlist():
         return []
 
 
+MODE_DESCRIPTIONS = {
+    'morning_open': "开盘30分钟分析",
+    'morning_mid': "上午盘中分析",
+    'noon_break': "午间休市分析",
+    'afternoon_early': "下午开盘分析",
+    'afternoon_mid': "下午盘中分析",
+    'closing': "尾盘30分钟分析",
+    'post_market': "盘后复盘分析",
+    'pre_market': "盘前预判分析",
+    'weekend_analysis': "周末分析",
+    'general_analysis': "通用分析"
+}
+
+MODE_SPECIFIC_ADVICE = {
+    'morning_open': [
+        "1. 关注开盘30分钟强势股",
+        "2. 在9:45前完成第一批买入",
+        "3. 设置好止损位（-2%到-3%）"
+    ],
+    'morning_mid': [
+        "1. 观察上午趋势是否延续",
+        "2. 寻找回调买入机会",
+        "3. 控制仓位在5成以下"
+    ],
+    'noon_break': [
+        "1. 复盘上午操作",
+        "2. 制定下午交易计划",
+        "3. 关注午间消息面"
+    ],
+    'afternoon_early': [
+        "1. 观察开盘是否延续上午趋势",
+        "2. 谨慎追高，等待回调",
+        "3. 关注量能变化"
+    ],
+    'afternoon_mid': [
+        "1. 确认全天趋势",
+        "2. 尾盘寻找机会",
+        "3. 避免重仓过夜"
+    ],
+    'closing': [
+        "1. 尾盘谨慎操作",
+        "2. 关注最后30分钟异动",
+        "3. 准备盘后复盘"
+    ],
+    'post_market': [
+        "1. 复盘全天交易",
+        "2. 分析技术指标",
+        "3. 制定次日策略"
+    ],
+    'pre_market': [
+        "1. 关注技术形态",
+        "2. 制定开盘策略",
+        "3. 设置观察清单"
+    ],
+    'weekend_analysis': [
+        "1. 分析周线趋势",
+        "2. 关注周末政策",
+        "3. 制定下周策略"
+    ],
+    'general_analysis': [
+        "1. 分析近期走势",
+        "2. 寻找技术买点",
+        "3. 控制风险"
+    ]
+}
+
+# 各分析模式返回的股票列表字段（按显示优先级）
+STOCK_LIST_KEYS = ['results', 'daily_summary', 'stock_analysis', 'weekly_analysis', 'morning_summary']
+
+# 简表输出：(字段, 标题, 附加列字段, 附加列名)
+SUMMARY_SECTIONS = [
+    ('daily_summary', "📋 股票分析汇总", 'trend', "趋势"),
+    ('stock_analysis', "🔍 股票技术分析", 'pattern', "形态"),
+    ('weekly_analysis', "📅 周线分析", 'pattern', "形态"),
+    ('morning_summary', "🌅 上午表现汇总", 'trend', "趋势"),
+]
+
+# 走势预测输出：(字段, 标题, 取值字段, 取值映射, 数值字段, 数值名, 数值格式化)
+OUTLOOK_TREND_MAP = {'bullish': '看涨', 'bearish': '看跌', 'neutral': '中性'}
+OUTLOOK_SECTIONS = [
+    ('afternoon_outlook', "🌅 下午走势预测", 'trend', OUTLOOK_TREND_MAP, 'confidence', "置信度", lambda v: f"{v*100:.0f}%"),
+    ('tomorrow_outlook', "📅 明日走势预测", 'trend', OUTLOOK_TREND_MAP, 'confidence', "置信度", lambda v: f"{v*100:.0f}%"),
+    ('next_week_outlook', "🗓️  下周走势预测", 'trend', OUTLOOK_TREND_MAP, 'confidence', "置信度", lambda v: f"{v*100:.0f}%"),
+    ('opening_prediction', "🌄 开盘预测", 'impact', {'positive': '正面', 'negative': '负面', 'neutral': '中性'},
+     'strength', "强度", lambda v: f"{v:.1f}"),
+]
+
+
+def _fmt_num(x, width=8):
+    """格式化数值列，无法转换或缺失时显示 N/A"""
+    try:
+        v = float(x)
+        if pd.isna(v):
+            return " " * (width - 3) + "N/A"
+        return f"{v:>{width}.2f}"
+    except Exception:
+        return " " * (width - 3) + "N/A"
+
+
 def display_analysis_report(analysis_result: dict, watchlist: Optional[List[Dict[str, Any]]] = None):
-    """显示分析报告"""
-    mode_descriptions = {
-        'morning_open': "开盘30分钟分析",
-        'morning_mid': "上午盘中分析",
-        'noon_break': "午间休市分析",
-        'afternoon_early': "下午开盘分析",
-        'afternoon_mid': "下午盘中分析",
-        'closing': "尾盘30分钟分析",
-        'post_market': "盘后复盘分析",
-        'pre_market': "盘前预判分析",
-        'weekend_analysis': "周末分析",
-        'general_analysis': "通用分析"
-    }
+    """显示分析报告（逐行收集，最后一次性写出）"""
+    lines: List[str] = []
+    out = lines.append
     
     mode = analysis_result.get('mode', 'general_analysis')
-    mode_desc = mode_descriptions.get(mode, "市场分析")
+    mode_desc = MODE_DESCRIPTIONS.get(mode, "市场分析")
     
-    print("\n" + "="*100)
-    print(f"📈 {mode_desc}")
-    print("="*100)
-    print(f"分析时间: {analysis_result.get('analysis_time', 'N/A')}")
-    print(f"分析模式: {mode}")
-    print(f"分析重点: {analysis_result.get('focus', 'N/A')}")
+    out("\n" + "="*100)
+    out(f"📈 {mode_desc}")
+    out("="*100)
+    out(f"分析时间: {analysis_result.get('analysis_time', 'N/A')}")
+    out(f"分析模式: {mode}")
+    out(f"分析重点: {analysis_result.get('focus', 'N/A')}")
     
     # 显示推荐
     recommendation = analysis_result.get('recommendation', '')
     if recommendation:
-        print(f"\n🎯 操作建议: {recommendation}")
+        out(f"\n🎯 操作建议: {recommendation}")
     
     # 用 watchlist 补全价格/昨收等信息（用于解释涨跌来源）
     watch_map: Dict[str, Dict[str, Any]] = {}
@@ -174,13 +288,16 @@ def display_analysis_report(analysis_result: dict, watchlist: Optional[List[Dict
             if sym:
                 watch_map[sym] = w
 
+    # 各股票列表字段只取一次
+    stock_lists = {key: analysis_result.get(key) for key in STOCK_LIST_KEYS}
+
     # 显示详细结果（不截断）
-    if 'results' in analysis_result and analysis_result['results']:
-        results = analysis_result['results']
-        print(f"\n📊 分析结果（共{len(results)}只，不截断）：")
-        print("-"*110)
-        print(f"{'序号':>3}  {'代码':<10} {'名称':<12} {'评分':>6} {'现价':>8} {'昨收':>8} {'涨跌%':>8}  {'信号/备注'}")
-        print("-"*110)
+    results = stock_lists['results']
+    if results:
+        out(f"\n📊 分析结果（共{len(results)}只，不截断）：")
+        out("-"*110)
+        out(f"{'序号':>3}  {'代码':<10} {'名称':<12} {'评分':>6} {'现价':>8} {'昨收':>8} {'涨跌%':>8}  {'信号/备注'}")
+        out("-"*110)
 
         for i, item in enumerate(results, 1):
             symbol = str(item.get('symbol', '')).strip()
@@ -201,24 +318,6 @@ def display_analysis_report(analysis_result: dict, watchlist: Optional[List[Dict
             change_pct = ref.get('change_pct', item.get('change_pct', item.get('opening_change', 0)))
             price_source = str(ref.get('price_source', 'unknown'))
 
-            def _fmt_num(x, width=8):
-                try:
-                    v = float(x)
-                    if pd.isna(v):
-                        return " " * (width - 3) + "N/A"
-                    return f"{v:>{width}.2f}"
-                except Exception:
-                    return " " * (width - 3) + "N/A"
-
-            def _fmt_pct(x, width=8):
-                try:
-                    v = float(x)
-                    if pd.isna(v):
-                        return " " * (width - 3) + "N/A"
-                    return f"{v:>{width}.2f}"
-                except Exception:
-                    return " " * (width - 3) + "N/A"
-
             signal = item.get('signal', item.get('trend', ''))
             note_parts = []
             if prev_close not in (None, 0) and current_price is not None and not pd.isna(current_price):
@@ -228,152 +327,49 @@ def display_analysis_report(analysis_result: dict, watchlist: Optional[List[Dict
             if (current_price is None or pd.isna(current_price)) and last_close is not None and not pd.isna(last_close):
                 note_parts.append(f"最近收盘={float(last_close):.2f}")
             note = f" ({' | '.join(note_parts)})" if note_parts else ""
-            print(
+            out(
                 f"{i:>3}  {symbol:<10} {name[:12]:<12} {score:>6.1f} "
-                f"{_fmt_num(current_price)} {_fmt_num(prev_close)} {_fmt_pct(change_pct)}  {signal}{note}"
+                f"{_fmt_num(current_price)} {_fmt_num(prev_close)} {_fmt_num(change_pct)}  {signal}{note}"
             )
     
-    elif 'daily_summary' in analysis_result and analysis_result['daily_summary']:
-        print(f"\n📋 股票分析汇总:")
-        print("-"*80)
-        
-        for i, stock in enumerate(analysis_result['daily_summary'], 1):
-            symbol = str(stock.get('symbol', '')).strip()
-            name = stock.get('name', symbol)
-            score = stock.get('score', 0)
-            trend = stock.get('trend', '')
-            
-            print(f"{i:2d}. {symbol:<10} {str(name)[:12]:<12} 评分: {float(score):>5.1f} 趋势: {trend}")
-    
-    elif 'stock_analysis' in analysis_result and analysis_result['stock_analysis']:
-        print(f"\n🔍 股票技术分析:")
-        print("-"*80)
-        
-        for i, stock in enumerate(analysis_result['stock_analysis'], 1):
-            symbol = str(stock.get('symbol', '')).strip()
-            name = stock.get('name', symbol)
-            score = stock.get('score', 0)
-            pattern = stock.get('pattern', '')
-            
-            print(f"{i:2d}. {symbol:<10} {str(name)[:12]:<12} 评分: {float(score):>5.1f} 形态: {pattern}")
-    
-    elif 'weekly_analysis' in analysis_result and analysis_result['weekly_analysis']:
-        print(f"\n📅 周线分析:")
-        print("-"*80)
-        
-        for i, stock in enumerate(analysis_result['weekly_analysis'], 1):
-            symbol = str(stock.get('symbol', '')).strip()
-            name = stock.get('name', symbol)
-            score = stock.get('score', 0)
-            pattern = stock.get('pattern', '')
-            
-            print(f"{i:2d}. {symbol:<10} {str(name)[:12]:<12} 评分: {float(score):>5.1f} 形态: {pattern}")
-    
-    elif 'morning_summary' in analysis_result and analysis_result['morning_summary']:
-        print(f"\n🌅 上午表现汇总:")
-        print("-"*80)
-        
-        for i, stock in enumerate(analysis_result['morning_summary'], 1):
-            symbol = str(stock.get('symbol', '')).strip()
-            name = stock.get('name', symbol)
-            score = stock.get('score', 0)
-            trend = stock.get('trend', '')
-            
-            print(f"{i:2d}. {symbol:<10} {str(name)[:12]:<12} 评分: {float(score):>5.1f} 趋势: {trend}")
+    else:
+        for key, title, extra_field, extra_label in SUMMARY_SECTIONS:
+            stocks = stock_lists[key]
+            if not stocks:
+                continue
+            out(f"\n{title}:")
+            out("-"*80)
+            for i, stock in enumerate(stocks, 1):
+                symbol = str(stock.get('symbol', '')).strip()
+                name = stock.get('name', symbol)
+                score = stock.get('score', 0)
+                out(f"{i:2d}. {symbol:<10} {str(name)[:12]:<12} 评分: {float(score):>5.1f} "
+                      f"{extra_label}: {stock.get(extra_field, '')}")
+            break
     
     # 显示市场预测
-    if 'afternoon_outlook' in analysis_result:
-        outlook = analysis_result['afternoon_outlook']
-        trend_map = {'bullish': '看涨', 'bearish': '看跌', 'neutral': '中性'}
-        print(f"\n🌅 下午走势预测: {trend_map.get(outlook.get('trend', 'neutral'), '中性')} (置信度: {outlook.get('confidence', 0)*100:.0f}%)")
-    
-    if 'tomorrow_outlook' in analysis_result:
-        outlook = analysis_result['tomorrow_outlook']
-        trend_map = {'bullish': '看涨', 'bearish': '看跌', 'neutral': '中性'}
-        print(f"\n📅 明日走势预测: {trend_map.get(outlook.get('trend', 'neutral'), '中性')} (置信度: {outlook.get('confidence', 0)*100:.0f}%)")
-    
-    if 'next_week_outlook' in analysis_result:
-        outlook = analysis_result['next_week_outlook']
-        trend_map = {'bullish': '看涨', 'bearish': '看跌', 'neutral': '中性'}
-        print(f"\n🗓️  下周走势预测: {trend_map.get(outlook.get('trend', 'neutral'), '中性')} (置信度: {outlook.get('confidence', 0)*100:.0f}%)")
-    
-    if 'opening_prediction' in analysis_result:
-        prediction = analysis_result['opening_prediction']
-        impact_map = {'positive': '正面', 'negative': '负面', 'neutral': '中性'}
-        print(f"\n🌄 开盘预测: {impact_map.get(prediction.get('impact', 'neutral'), '中性')} (强度: {prediction.get('strength', 0):.1f})")
+    for key, title, value_field, value_map, num_field, num_label, num_fmt in OUTLOOK_SECTIONS:
+        if key in analysis_result:
+            outlook = analysis_result[key]
+            label = value_map.get(outlook.get(value_field, 'neutral'), '中性')
+            out(f"\n{title}: {label} ({num_label}: {num_fmt(outlook.get(num_field, 0))})")
     
     # 显示统计信息
     stocks_analyzed = analysis_result.get('stocks_analyzed', 0)
     if stocks_analyzed == 0:
         # 尝试从其他字段获取
-        for key in ['results', 'daily_summary', 'stock_analysis', 'weekly_analysis', 'morning_summary']:
-            if key in analysis_result and analysis_result[key]:
-                stocks_analyzed = len(analysis_result[key])
-                break
+        stocks_analyzed = next((len(v) for v in stock_lists.values() if v), 0)
     
-    print(f"\n📈 分析统计:")
-    print(f"  分析股票数: {stocks_analyzed}")
+    out(f"\n📈 分析统计:")
+    out(f"  分析股票数: {stocks_analyzed}")
     
     # 根据模式给出具体建议
-    print(f"\n💡 具体操作建议:")
+    out(f"\n💡 具体操作建议:")
+    for advice in MODE_SPECIFIC_ADVICE.get(mode, ["根据具体分析结果操作"]):
+        out(f"  {advice}")
     
-    mode_specific_advice = {
-        'morning_open': [
-            "1. 关注开盘30分钟强势股",
-            "2. 在9:45前完成第一批买入",
-            "3. 设置好止损位（-2%到-3%）"
-        ],
-        'morning_mid': [
-            "1. 观察上午趋势是否延续",
-            "2. 寻找回调买入机会",
-            "3. 控制仓位在5成以下"
-        ],
-        'noon_break': [
-            "1. 复盘上午操作",
-            "2. 制定下午交易计划",
-            "3. 关注午间消息面"
-        ],
-        'afternoon_early': [
-            "1. 观察开盘是否延续上午趋势",
-            "2. 谨慎追高，等待回调",
-            "3. 关注量能变化"
-        ],
-        'afternoon_mid': [
-            "1. 确认全天趋势",
-            "2. 尾盘寻找机会",
-            "3. 避免重仓过夜"
-        ],
-        'closing': [
-            "1. 尾盘谨慎操作",
-            "2. 关注最后30分钟异动",
-            "3. 准备盘后复盘"
-        ],
-        'post_market': [
-            "1. 复盘全天交易",
-            "2. 分析技术指标",
-            "3. 制定次日策略"
-        ],
-        'pre_market': [
-            "1. 关注技术形态",
-            "2. 制定开盘策略",
-            "3. 设置观察清单"
-        ],
-        'weekend_analysis': [
-            "1. 分析周线趋势",
-            "2. 关注周末政策",
-            "3. 制定下周策略"
-        ],
-        'general_analysis': [
-            "1. 分析近期走势",
-            "2. 寻找技术买点",
-            "3. 控制风险"
-        ]
-    }
-    
-    for advice in mode_specific_advice.get(mode, ["根据具体分析结果操作"]):
-        print(f"  {advice}")
-    
-    print("\n" + "="*100)
+    out("\n" + "="*100)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def save_analysis_result(analysis_result: dict):
@@ -386,38 +382,19 @@ def save_analysis_result(analysis_result: dict):
     os.makedirs(results_dir, exist_ok=True)
     
     # 保存为JSON
-    import json
     filename = os.path.join(results_dir, f"{mode}_analysis_{timestamp}.json")
     
-    # 转换不可序列化的对象
-    def make_serializable(obj):
-        if isinstance(obj, (pd.Timestamp, datetime)):
-            return obj.isoformat()
-        elif isinstance(obj, pd.DataFrame):
-            return obj.to_dict('records')
-        elif isinstance(obj, (int, float, str, bool, type(None))):
-            return obj
-        elif isinstance(obj, dict):
-            return {k: make_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [make_serializable(v) for v in obj]
-        else:
-            return str(obj)
-    
     try:
-        cleaned_result = make_serializable(analysis_result)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_result, f, ensure_ascii=False, indent=2)
+        write_json(analysis_result, filename)
         
         print(f"💾 分析结果已保存: {filename}")
         
         # 同时保存为CSV格式（如果有股票数据）
-        for key in ['results', 'daily_summary', 'stock_analysis', 'weekly_analysis', 'morning_summary']:
+        for key in STOCK_LIST_KEYS:
             if key in analysis_result and analysis_result[key]:
                 df = pd.DataFrame(analysis_result[key])
                 csv_file = os.path.join(results_dir, f"{mode}_stocks_{timestamp}.csv")
-                df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+                write_csv(df, csv_file)
                 print(f"💾 股票数据已保存: {csv_file}")
                 break
                 
@@ -425,10 +402,37 @@ def save_analysis_result(analysis_result: dict):
         logger.error(f"保存结果失败: {e}")
 
 
+# 全市场实时行情快照缓存（同一轮分析内多次调用复用，避免重复下载约5000行的行情表）
+SPOT_CACHE_TTL = 10  # 秒
+_spot_cache: Dict[str, Any] = {'timestamp': 0.0, 'data': None}
+
+
+def get_spot_snapshot() -> Optional[pd.DataFrame]:
+    """获取全市场实时行情（按 6 位代码索引，带短 TTL 缓存），失败返回 None"""
+    now = time.monotonic()
+    cached = _spot_cache['data']
+    if cached is not None and now - _spot_cache['timestamp'] < SPOT_CACHE_TTL:
+        return cached
+    
+    if ak is None:
+        return None
+    try:
+        spot_df = ak.stock_zh_a_spot_em()
+    except Exception as e:
+        logger.debug("stock_zh_a_spot_em 获取失败: %s", e)
+        return None
+    if spot_df is None or spot_df.empty or '代码' not in spot_df.columns:
+        return None
+    
+    spot_df = spot_df.assign(代码=spot_df['代码'].astype(str))
+    spot_df = spot_df.drop_duplicates(subset='代码').set_index('代码')
+    _spot_cache['timestamp'] = now
+    _spot_cache['data'] = spot_df
+    return spot_df
+
+
 def update_realtime_data(watchlist: List[Dict], data_fetcher) -> List[Dict]:
     """更新监控列表的实时数据"""
-    import akshare as ak
-    
     updated_list = []
 
     def _build_eq_code(symbol: str) -> str:
@@ -440,12 +444,8 @@ def update_realtime_data(watchlist: List[Dict], data_fetcher) -> List[Dict]:
             return f"sz{code}"
         return code
 
-    # 1) 全市场实时行情（尽量一次请求）
-    realtime_df = None
-    try:
-        realtime_df = ak.stock_zh_a_spot_em()
-    except Exception:
-        realtime_df = None
+    # 1) 全市场实时行情（一次请求，按代码索引后逐只 O(1) 查找）
+    realtime_df = get_spot_snapshot()
 
     # 2) easyquotation：无论 spot_em 成功与否，都提前批量取 watchlist 报价，用来兜底缺失项
     eq_quotes: Dict[str, Any] = {}
@@ -524,15 +524,13 @@ def update_realtime_data(watchlist: List[Dict], data_fetcher) -> List[Dict]:
             # 再尝试用实时数据拿“现价”
             current_price = None
             # 2.1 先用 spot_em（若可用）
-            if realtime_df is not None and not realtime_df.empty and '代码' in realtime_df.columns:
-                stock_data = realtime_df[realtime_df['代码'].astype(str) == str(code)]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    v = pd.to_numeric(row.get('最新价', None), errors='coerce')
-                    if v is not None and not pd.isna(v):
-                        current_price = float(v)
-                        stock['price'] = current_price  # 现价（实时）
-                        stock['price_source'] = 'spot'
+            if realtime_df is not None and code in realtime_df.index:
+                row = realtime_df.loc[code]
+                v = pd.to_numeric(row.get('最新价', None), errors='coerce')
+                if v is not None and not pd.isna(v):
+                    current_price = float(v)
+                    stock['price'] = current_price  # 现价（实时）
+                    stock['price_source'] = 'spot'
 
             # 2.2 spot_em 失败/缺失 -> easyquotation 兜底
             if current_price is None:
@@ -556,7 +554,7 @@ def update_realtime_data(watchlist: List[Dict], data_fetcher) -> List[Dict]:
                                 stock['prev_close'] = prev_close
 
             # 2.3 再兜底：分钟线（个股请求，有时比 spot_em 稳）
-            if current_price is None:
+            if current_price is None and ak is not None:
                 try:
                     df_min = ak.stock_zh_a_hist_min_em(
                         symbol=code,
@@ -617,7 +615,7 @@ def main():
     # 如果文件加载失败，尝试实时获取
     if not watchlist:
         print("   文件加载失败，尝试实时获取...")
-        watchlist = get_realtime_watchlist()
+        watchlist = get_realtime_watchlist(data_fetcher)
     
     if not watchlist:
         print("❌ 无法获取监控列表，程序退出")
@@ -627,10 +625,7 @@ def main():
     print(f"✅ 获取到 {len(watchlist)} 只监控股票")
     
     # 2.5 如果是盘中时段，更新实时数据
-    current_time = datetime.now().time()
-    is_trading_time = (time(9, 30) <= current_time <= time(11, 30)) or (time(13, 0) <= current_time <= time(15, 0))
-    
-    if is_trading_time:
+    if is_trading_time(datetime.now()):
         print("\n2.5 更新实时数据...")
         watchlist = update_realtime_data(watchlist, data_fetcher)
         print(f"✅ 已更新 {len(watchlist)} 只股票的实时数据")
@@ -4,6 +4,8 @@
 """
 import sys
 import os
+import csv
+import functools
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -15,11 +17,88 @@ if PROJECT_ROOT not in sys.path:
 
 from src.data.data_fetcher import ShortTermDataFetcher
 from src.core.stock_filter import StockFilter
+from src.data.csv_writer import write_csv
+from src.utils.jit import jit
+from src.utils.results_files import find_latest_watchlist_file
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 趋势方向编码：数值内核只处理整数编码，输出报告时再映射回字符串
+TREND_DIRECTIONS = (
+    'sideways',          # 0 震荡
+    'strong_uptrend',    # 1 强势上升
+    'uptrend',           # 2 上升趋势
+    'weak_uptrend',      # 3 弱势上升
+    'strong_downtrend',  # 4 强势下降
+    'downtrend',         # 5 下降趋势
+    'weak_downtrend',    # 6 弱势下降
+)
+UPTREND_CODES = (1, 2, 3)
+DOWNTREND_CODES = (4, 5, 6)
+VOLUME_TREND_CODES = {'increasing': 1, 'decreasing': -1, 'stable': 0, 'unknown': 0}
+VOLUME_TREND_NAMES = {1: 'increasing', -1: 'decreasing', 0: 'stable'}
+# 指标只看末端：均线/支撑阻力最多用最近20根K线，波动率用最近60个日收益（约3个月）
+VOLATILITY_WINDOW = 60
+
+
+@jit
+def trend_score_kernel(price, ma5, ma10, ma20, mom5, vol_code, volatility):
+    """
+    趋势判断 + 综合评分内核（纯数值，可被 numba 编译）
+    
+    Returns:
+        (trend_code, score)，trend_code 对应 TREND_DIRECTIONS 下标
+    """
+    # 趋势方向
+    if price > ma5 and ma5 > ma10 and ma10 > ma20:
+        trend_code, score = 1, 80.0
+    elif price > ma5 and ma5 > ma10:
+        trend_code, score = 2, 70.0
+    elif price > ma20:
+        trend_code, score = 3, 60.0
+    elif price < ma5 and ma5 < ma10 and ma10 < ma20:
+        trend_code, score = 4, 20.0
+    elif price < ma5 and ma5 < ma10:
+        trend_code, score = 5, 30.0
+    elif price < ma20:
+        trend_code, score = 6, 40.0
+    else:
+        trend_code, score = 0, 50.0
+    
+    # 动量得分（最多 ±10 分）
+    if mom5 > 0:
+        score += min(mom5, 10.0)
+    else:
+        score += max(mom5, -10.0)
+    
+    # 成交量得分
+    score += 5.0 * vol_code
+    
+    # 波动率扣分（波动率过高不好）
+    if volatility > 40:
+        score -= 10.0
+    elif volatility > 30:
+        score -= 5.0
+    
+    return trend_code, max(0.0, min(100.0, score))
+
+
+@jit
+def trend_score_batch(price, ma5, ma10, ma20, mom5, vol_code, volatility):
+    """对 N 只股票逐个调用 trend_score_kernel，返回 (trend_codes, scores) 两个数组"""
+    n = price.shape[0]
+    trend_codes = np.empty(n, dtype=np.int64)
+    scores = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        trend_code, score = trend_score_kernel(
+            price[i], ma5[i], ma10[i], ma20[i], mom5[i], vol_code[i], volatility[i]
+        )
+        trend_codes[i] = trend_code
+        scores[i] = score
+    return trend_codes, scores
+
 
 class StockTrendAnalyzer:
     """股票趋势分析器（基于历史数据）"""
@@ -38,98 +117,108 @@ class StockTrendAnalyzer:
         Returns:
             趋势分析结果字典
         """
-        # 获取历史数据
         hist_data = self.data_fetcher.get_stock_history(symbol, period=period)
+        return self._analyze_histories([symbol], [hist_data])[0]
+    
+    def _analyze_histories(self, symbols: list, histories: list) -> list:
+        """
+        批量计算趋势指标
         
-        if hist_data.empty or len(hist_data) < 20:
-            return {
-                'symbol': symbol,
-                'status': 'insufficient_data',
-                'message': '数据不足，无法分析'
-            }
+        各股收盘价/成交量右对齐堆叠为 (N, T) 矩阵（较短的历史在左侧补 NaN），
+        均线、动量、波动率等按行一次性向量化计算，再逐只组装结果字典。
         
-        # 计算技术指标
-        closes = hist_data['close']
-        volumes = hist_data['volume'] if 'volume' in hist_data.columns else None
+        Returns:
+            与 symbols 顺序一致的趋势分析结果列表
+        """
+        results = [None] * len(symbols)
+        valid = []
+        for idx, (symbol, hist_data) in enumerate(zip(symbols, histories)):
+            if hist_data is None or hist_data.empty or len(hist_data) < 20:
+                results[idx] = {
+                    'symbol': symbol,
+                    'status': 'insufficient_data',
+                    'message': '数据不足，无法分析'
+                }
+            else:
+                valid.append(idx)
         
-        # 均线系统
-        ma5 = closes.rolling(5).mean()
-        ma10 = closes.rolling(10).mean()
-        ma20 = closes.rolling(20).mean()
+        if not valid:
+            return results
         
-        current_price = closes.iloc[-1]
-        ma5_current = ma5.iloc[-1]
-        ma10_current = ma10.iloc[-1]
-        ma20_current = ma20.iloc[-1]
+        # 只堆叠末端 VOLATILITY_WINDOW+1 根K线，3mo/6mo 周期也不用处理整段历史
+        n = len(valid)
+        t = min(max(len(histories[idx]) for idx in valid), VOLATILITY_WINDOW + 1)
+        closes = np.full((n, t), np.nan)
+        volumes = np.full((n, t), np.nan)
+        has_volume = np.zeros(n, dtype=bool)
+        for row, idx in enumerate(valid):
+            hist_data = histories[idx]
+            length = min(len(hist_data), t)
+            closes[row, t - length:] = hist_data['close'].to_numpy(dtype=np.float64, copy=False)[-length:]
+            if 'volume' in hist_data.columns:
+                volumes[row, t - length:] = hist_data['volume'].to_numpy(dtype=np.float64, copy=False)[-length:]
+                has_volume[row] = True
         
-        # 趋势判断
-        trend_direction = self._judge_trend(current_price, ma5_current, ma10_current, ma20_current)
+        # 均线系统（每只股票至少20根K线，末端20列内没有补位 NaN）
+        current_price = closes[:, -1]
+        ma5 = closes[:, -5:].mean(axis=1)
+        ma10 = closes[:, -10:].mean(axis=1)
+        ma20 = closes[:, -20:].mean(axis=1)
         
         # 动量分析
-        momentum_5d = (closes.iloc[-1] / closes.iloc[-5] - 1) * 100 if len(closes) >= 5 else 0
-        momentum_20d = (closes.iloc[-1] / closes.iloc[-20] - 1) * 100 if len(closes) >= 20 else 0
+        momentum_5d = (current_price / closes[:, -5] - 1) * 100
+        momentum_20d = (current_price / closes[:, -20] - 1) * 100
         
-        # 成交量分析
-        volume_trend = 'unknown'
-        if volumes is not None and len(volumes) >= 10:
-            recent_vol = volumes.iloc[-5:].mean()
-            earlier_vol = volumes.iloc[-10:-5].mean()
-            if recent_vol > earlier_vol * 1.2:
-                volume_trend = 'increasing'
-            elif recent_vol < earlier_vol * 0.8:
-                volume_trend = 'decreasing'
-            else:
-                volume_trend = 'stable'
+        # 成交量分析：近5日均量 vs 前5日均量
+        recent_vol = volumes[:, -5:].mean(axis=1)
+        earlier_vol = volumes[:, -10:-5].mean(axis=1)
+        vol_codes = np.where(
+            recent_vol > earlier_vol * 1.2, 1,
+            np.where(recent_vol < earlier_vol * 0.8, -1, 0)
+        )
+        vol_codes[~has_volume] = 0
         
-        # 波动率
-        volatility = closes.pct_change().std() * np.sqrt(252) * 100  # 年化波动率
+        # 波动率：最近 VOLATILITY_WINDOW 个日收益的样本标准差（ddof=1，忽略补位 NaN）年化；
+        # 历史不足60日时即为全周期波动率，与原 pct_change().std() 一致
+        returns = closes[:, 1:] / closes[:, :-1] - 1.0
+        volatility = np.nanstd(returns, axis=1, ddof=1) * np.sqrt(252) * 100  # 年化波动率
         
         # 支撑位和阻力位
-        support = closes.tail(20).min()
-        resistance = closes.tail(20).max()
+        support = closes[:, -20:].min(axis=1)
+        resistance = closes[:, -20:].max(axis=1)
         
-        # 综合评分
-        score = self._calculate_trend_score(
-            trend_direction, momentum_5d, momentum_20d, 
-            volume_trend, volatility
+        # 趋势判断 + 综合评分
+        trend_codes, scores = trend_score_batch(
+            current_price, ma5, ma10, ma20, momentum_5d, vol_codes, volatility
         )
         
-        return {
-            'symbol': symbol,
-            'status': 'success',
-            'current_price': round(current_price, 2),
-            'trend_direction': trend_direction,
-            'trend_strength': self._get_trend_strength(trend_direction, momentum_5d),
-            'ma5': round(ma5_current, 2),
-            'ma10': round(ma10_current, 2),
-            'ma20': round(ma20_current, 2),
-            'momentum_5d': round(momentum_5d, 2),
-            'momentum_20d': round(momentum_20d, 2),
-            'volume_trend': volume_trend,
-            'volatility': round(volatility, 2),
-            'support': round(support, 2),
-            'resistance': round(resistance, 2),
-            'score': round(score, 1),
-            'recommendation': self._get_recommendation(score, trend_direction),
-            'last_update': hist_data.index[-1].strftime('%Y-%m-%d')
-        }
-    
-    def _judge_trend(self, price, ma5, ma10, ma20) -> str:
-        """判断趋势方向"""
-        if price > ma5 > ma10 > ma20:
-            return 'strong_uptrend'  # 强势上升
-        elif price > ma5 > ma10:
-            return 'uptrend'  # 上升趋势
-        elif price > ma20:
-            return 'weak_uptrend'  # 弱势上升
-        elif price < ma5 < ma10 < ma20:
-            return 'strong_downtrend'  # 强势下降
-        elif price < ma5 < ma10:
-            return 'downtrend'  # 下降趋势
-        elif price < ma20:
-            return 'weak_downtrend'  # 弱势下降
-        else:
-            return 'sideways'  # 震荡
+        for row, idx in enumerate(valid):
+            trend_code = int(trend_codes[row])
+            trend_direction = TREND_DIRECTIONS[trend_code]
+            score = float(scores[row])
+            volume_trend = VOLUME_TREND_NAMES[int(vol_codes[row])] if has_volume[row] else 'unknown'
+            results[idx] = {
+                'symbol': symbols[idx],
+                'status': 'success',
+                'current_price': round(float(current_price[row]), 2),
+                'trend_direction': trend_direction,
+                'trend_code': trend_code,
+                'trend_strength': self._get_trend_strength(trend_direction, momentum_5d[row]),
+                'ma5': round(float(ma5[row]), 2),
+                'ma10': round(float(ma10[row]), 2),
+                'ma20': round(float(ma20[row]), 2),
+                'momentum_5d': round(float(momentum_5d[row]), 2),
+                'momentum_20d': round(float(momentum_20d[row]), 2),
+                'volume_trend': volume_trend,
+                'volatility': round(float(volatility[row]), 2),
+                'support': round(float(support[row]), 2),
+                'resistance': round(float(resistance[row]), 2),
+                'score': round(score, 1),
+                'recommendation': self._get_recommendation(score, trend_direction),
+                'last_update': histories[idx].index[-1].strftime('%Y-%m-%d')
+            }
+        
+        return results
     
     def _get_trend_strength(self, trend_direction: str, momentum_5d: float) -> str:
         """获取趋势强度"""
@@ -140,44 +229,6 @@ class StockTrendAnalyzer:
         else:
             return 'weak'
     
-    def _calculate_trend_score(self, trend, mom5, mom20, vol_trend, volatility) -> float:
-        """计算趋势评分"""
-        score = 50  # 基础分
-        
-        # 趋势方向得分
-        if trend == 'strong_uptrend':
-            score += 30
-        elif trend == 'uptrend':
-            score += 20
-        elif trend == 'weak_uptrend':
-            score += 10
-        elif trend == 'strong_downtrend':
-            score -= 30
-        elif trend == 'downtrend':
-            score -= 20
-        elif trend == 'weak_downtrend':
-            score -= 10
-        
-        # 动量得分
-        if mom5 > 0:
-            score += min(mom5, 10)  # 最多加10分
-        else:
-            score += max(mom5, -10)  # 最多减10分
-        
-        # 成交量得分
-        if vol_trend == 'increasing':
-            score += 5
-        elif vol_trend == 'decreasing':
-            score -= 5
-        
-        # 波动率扣分（波动率过高不好）
-        if volatility > 40:
-            score -= 10
-        elif volatility > 30:
-            score -= 5
-        
-        return max(0, min(100, score))
-    
     def _get_recommendation(self, score: float, trend: str) -> str:
         """获取操作建议"""
         if score >= 70 and 'uptrend' in trend:
@@ -195,38 +246,51 @@ class StockTrendAnalyzer:
         """
         分析监控列表中的所有股票
         
+        先逐只获取历史数据（BaoStock 底层是单个全局连接，请求只能串行），
+        再对所有获取成功的股票批量计算指标。
+        
         Args:
             watchlist: 股票列表，格式 [{'symbol': '000001.SZ', 'name': '平安银行'}, ...]
             period: 数据周期
         
         Returns:
-            DataFrame，包含所有股票的趋势分析结果
+            DataFrame，包含所有股票的趋势分析结果（顺序与 watchlist 一致）
         """
-        results = []
+        stocks = [stock for stock in watchlist if stock.get('symbol', '')]
+        symbols = [stock['symbol'] for stock in stocks]
+        histories = [None] * len(stocks)
+        errors = {}
         
         print(f"\n📊 开始分析 {len(watchlist)} 只股票的趋势...")
         
-        for idx, stock in enumerate(watchlist, 1):
-            symbol = stock.get('symbol', '')
-            name = stock.get('name', '')
-            
-            if not symbol:
-                continue
-            
-            print(f"  [{idx}/{len(watchlist)}] 分析 {name} ({symbol})...", end='\r')
-            
+        # 1) 获取历史数据
+        for idx, stock in enumerate(stocks):
+            print(f"  [{idx + 1}/{len(stocks)}] 分析 {stock.get('name', '')} ({stock['symbol']})...", end='\r')
             try:
-                trend_result = self.analyze_trend(symbol, period)
-                trend_result['name'] = name
-                results.append(trend_result)
+                histories[idx] = self.data_fetcher.get_stock_history(stock['symbol'], period=period)
             except Exception as e:
-                logger.warning(f"分析 {symbol} 失败: {e}")
-                results.append({
-                    'symbol': symbol,
-                    'name': name,
-                    'status': 'error',
-                    'message': str(e)
-                })
+                logger.warning(f"分析 {stock['symbol']} 失败: {e}")
+                errors[idx] = str(e)
+        
+        # 2) 批量计算指标；批量计算出错时逐只重算，单只股票的异常不影响其他股票
+        ok_idx = [idx for idx in range(len(stocks)) if idx not in errors]
+        try:
+            analyzed = self._analyze_histories([symbols[i] for i in ok_idx], [histories[i] for i in ok_idx])
+        except Exception:
+            analyzed = []
+            for idx in ok_idx:
+                try:
+                    analyzed.append(self._analyze_histories([symbols[idx]], [histories[idx]])[0])
+                except Exception as e:
+                    logger.warning(f"分析 {symbols[idx]} 失败: {e}")
+                    analyzed.append({'symbol': symbols[idx], 'status': 'error', 'message': str(e)})
+        results = [None] * len(stocks)
+        for idx, trend_result in zip(ok_idx, analyzed):
+            results[idx] = trend_result
+        for idx, message in errors.items():
+            results[idx] = {'symbol': symbols[idx], 'status': 'error', 'message': message}
+        for stock, trend_result in zip(stocks, results):
+            trend_result['name'] = stock.get('name', '')
         
         print(" " * 80, end='\r')  # 清除进度行
         print(f"✅ 分析完成，共 {len(results)} 只股票")
@@ -236,37 +300,23 @@ class StockTrendAnalyzer:
 
 def load_watchlist_from_results(results_dir: str = "results") -> list:
     """从结果文件加载监控列表"""
-    import glob
-    
     if not os.path.exists(results_dir):
         return []
     
     # 查找最新的推荐股票文件
-    patterns = [
-        "recommended_stocks_*.csv",
-        "stocks_simple_*.csv",
-        "simple_recommendations_*.csv",
-        "recommendations_*.csv",
-    ]
-    
-    files = []
-    for pattern in patterns:
-        files.extend(glob.glob(os.path.join(results_dir, pattern)))
-    
-    if not files:
+    latest_file = find_latest_watchlist_file(results_dir)
+    if latest_file is None:
         return []
     
-    latest_file = max(files, key=os.path.getctime)
     print(f"📂 加载监控列表: {os.path.basename(latest_file)}")
     
-    df = pd.read_csv(latest_file, encoding='utf-8-sig')
-    
+    # 推荐列表只有几十行，用 csv 模块逐行读取即可，无需构造 DataFrame
     watchlist = []
-    for _, row in df.iterrows():
-        symbol = str(row.get('symbol', '')).strip()
-        name = str(row.get('name', '')).strip()
-        if symbol:
-            watchlist.append({'symbol': symbol, 'name': name})
+    with open(latest_file, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get('symbol') or '').strip()
+            if symbol:
+                watchlist.append({'symbol': symbol, 'name': (row.get('name') or '').strip()})
     
     return watchlist
 
@@ -287,66 +337,90 @@ def display_trend_report(df: pd.DataFrame):
     # 按评分排序
     success_df = success_df.sort_values('score', ascending=False)
     
-    print("\n" + "="*100)
-    print("📈 股票趋势分析报告")
-    print("="*100)
-    print(f"分析时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"分析股票数: {len(success_df)}")
-    print()
+    # 报告逐行收集，最后一次性写出
+    lines = []
+    out = lines.append
+    
+    # 趋势分类按整数编码过滤（避免逐行字符串匹配）
+    trend_codes = success_df['trend_code']
+    is_up = trend_codes.isin(UPTREND_CODES)
+    is_down = trend_codes.isin(DOWNTREND_CODES)
+    
+    out("\n" + "="*100)
+    out("📈 股票趋势分析报告")
+    out("="*100)
+    out(f"分析时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    out(f"分析股票数: {len(success_df)}")
+    out("")
     
     # 按趋势分类显示
-    print("🔥 强势上升趋势 (评分≥70):")
+    out("🔥 强势上升趋势 (评分≥70):")
     strong_uptrend = success_df[
-        (success_df['score'] >= 70) & 
-        (success_df['trend_direction'].str.contains('uptrend', na=False))
+        (success_df['score'] >= 70) & is_up
     ]
     if not strong_uptrend.empty:
         for _, row in strong_uptrend.iterrows():
-            print(f"  ⭐ {row['name']} ({row['symbol']})")
-            print(f"     价格: {row['current_price']:.2f} | 趋势: {row['trend_direction']} | 评分: {row['score']}")
-            print(f"     5日涨幅: {row['momentum_5d']:+.2f}% | 20日涨幅: {row['momentum_20d']:+.2f}%")
-            print(f"     建议: {row['recommendation']} | 支撑: {row['support']:.2f} | 阻力: {row['resistance']:.2f}")
-            print()
+            out(f"  ⭐ {row['name']} ({row['symbol']})")
+            out(f"     价格: {row['current_price']:.2f} | 趋势: {row['trend_direction']} | 评分: {row['score']}")
+            out(f"     5日涨幅: {row['momentum_5d']:+.2f}% | 20日涨幅: {row['momentum_20d']:+.2f}%")
+            out(f"     建议: {row['recommendation']} | 支撑: {row['support']:.2f} | 阻力: {row['resistance']:.2f}")
+            out("")
     else:
-        print("  暂无")
-        print()
+        out("  暂无")
+        out("")
     
-    print("📊 上升趋势 (评分60-70):")
+    out("📊 上升趋势 (评分60-70):")
     uptrend = success_df[
-        (success_df['score'] >= 60) & (success_df['score'] < 70) &
-        (success_df['trend_direction'].str.contains('uptrend', na=False))
+        (success_df['score'] >= 60) & (success_df['score'] < 70) & is_up
     ]
     if not uptrend.empty:
         for _, row in uptrend.head(5).iterrows():
-            print(f"  📈 {row['name']} ({row['symbol']})")
-            print(f"     价格: {row['current_price']:.2f} | 评分: {row['score']} | 建议: {row['recommendation']}")
-            print()
+            out(f"  📈 {row['name']} ({row['symbol']})")
+            out(f"     价格: {row['current_price']:.2f} | 评分: {row['score']} | 建议: {row['recommendation']}")
+            out("")
     else:
-        print("  暂无")
-        print()
+        out("  暂无")
+        out("")
     
-    print("⚠️  下降趋势 (评分<50):")
+    out("⚠️  下降趋势 (评分<50):")
     downtrend = success_df[
-        (success_df['score'] < 50) |
-        (success_df['trend_direction'].str.contains('downtrend', na=False))
+        (success_df['score'] < 50) | is_down
     ]
     if not downtrend.empty:
         for _, row in downtrend.head(5).iterrows():
-            print(f"  ⬇️  {row['name']} ({row['symbol']})")
-            print(f"     价格: {row['current_price']:.2f} | 评分: {row['score']} | 趋势: {row['trend_direction']}")
-            print()
+            out(f"  ⬇️  {row['name']} ({row['symbol']})")
+            out(f"     价格: {row['current_price']:.2f} | 评分: {row['score']} | 趋势: {row['trend_direction']}")
+            out("")
     else:
-        print("  暂无")
-        print()
+        out("  暂无")
+        out("")
     
     # 统计信息
-    print("="*100)
-    print("📊 统计信息:")
-    print(f"  强势上升: {len(strong_uptrend)} 只")
-    print(f"  上升趋势: {len(uptrend)} 只")
-    print(f"  下降趋势: {len(downtrend)} 只")
-    print(f"  平均评分: {success_df['score'].mean():.1f}")
-    print("="*100)
+    out("="*100)
+    out("📊 统计信息:")
+    out(f"  强势上升: {len(strong_uptrend)} 只")
+    out(f"  上升趋势: {len(uptrend)} 只")
+    out(f"  下降趋势: {len(downtrend)} 只")
+    out(f"  平均评分: {success_df['score'].mean():.1f}")
+    out("="*100)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+@functools.lru_cache(maxsize=1)
+def get_fetcher() -> ShortTermDataFetcher:
+    """模块内共享的数据获取器（复用 BaoStock 连接、速率控制与历史数据缓存）"""
+    return ShortTermDataFetcher(use_cache=True, rate_limit=0.3)
+
+
+def save_trend_results(results_df: pd.DataFrame):
+    """只保存成功分析的数据"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f"results/trend_analysis_{timestamp}.csv"
+    
+    success_df = results_df[results_df['status'] == 'success']
+    if not success_df.empty:
+        write_csv(success_df, output_file)
+        print(f"\n💾 结果已保存: {output_file}")
 
 
 def main():
@@ -370,7 +444,7 @@ def main():
     
     # 2. 初始化分析器
     print("\n2. 初始化分析器...")
-    data_fetcher = ShortTermDataFetcher(use_cache=True, rate_limit=0.3)
+    data_fetcher = get_fetcher()
     analyzer = StockTrendAnalyzer(data_fetcher)
     
     # 3. 分析趋势（使用 try/finally 确保 BaoStock 连接关闭）
@@ -384,14 +458,7 @@ def main():
     display_trend_report(results_df)
     
     # 5. 保存结果
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"results/trend_analysis_{timestamp}.csv"
-    
-    # 只保存成功分析的数据
-    success_df = results_df[results_df['status'] == 'success']
-    if not success_df.empty:
-        success_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-        print(f"\n💾 结果已保存: {output_file}")
+    save_trend_results(results_df)
     
     print("\n✅ 分析完成！")
 
@@ -413,18 +480,12 @@ if __name__ == "__main__":
         
         if watchlist:
             print(f"使用指定的股票代码: {len(watchlist)} 只")
-            data_fetcher = ShortTermDataFetcher(use_cache=True, rate_limit=0.3)
+            data_fetcher = get_fetcher()
             analyzer = StockTrendAnalyzer(data_fetcher)
             try:
                 results_df = analyzer.analyze_watchlist(watchlist, period=args.period)
                 display_trend_report(results_df)
-                
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = f"results/trend_analysis_{timestamp}.csv"
-                success_df = results_df[results_df['status'] == 'success']
-                if not success_df.empty:
-                    success_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-                    print(f"\n💾 结果已保存: {output_file}")
+                save_trend_results(results_df)
             finally:
                 data_fetcher.close()  # 确保关闭 BaoStock 连接
         else:
@@ -1,13 +1,17 @@
 """
 短线稳健策略执行系统 - 兼容性修复版
 """
-import yaml
+import os
 import logging
 import pandas as pd
 from datetime import datetime, time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from src.data.data_fetcher import ShortTermDataFetcher
 from src.core.market_analyzer import MarketAnalyzer
 from src.core.stock_filter import StockFilter
+from src.data.csv_writer import write_csv, to_arrow_table
+from src.utils.config_loader import load_yaml
 # 复用 analyze_anytime.py 的实时数据更新函数（支持 easyquotation 兜底）
 from analyze_anytime import update_realtime_data
 
@@ -18,10 +22,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CONFIG_PATH = 'config/sectors.yaml'
+SECTOR_FILTER_WORKERS = 8  # 板块并发筛选的最大线程数
+RESULTS_DIR = Path("results")  # 结果输出目录
+
 def load_config():
-    """加载配置文件"""
-    with open('config/sectors.yaml', 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    """加载配置文件（返回副本，调用方修改不会污染缓存）"""
+    return load_yaml(CONFIG_PATH)
 
 def analyze_stocks_by_sector(stock_filter, recommended_sectors):
     """按推荐板块分析个股"""
@@ -29,18 +36,27 @@ def analyze_stocks_by_sector(stock_filter, recommended_sectors):
     print("-" * 60)
     
     all_recommended_stocks = []
+    if not recommended_sectors:
+        return all_recommended_stocks
+    
+    # 使用筛选器并发分析各板块个股（网络 I/O 为主），结果按板块顺序输出
+    with ThreadPoolExecutor(max_workers=min(SECTOR_FILTER_WORKERS, len(recommended_sectors))) as executor:
+        futures = [
+            executor.submit(
+                stock_filter.filter_stocks_in_sector,
+                sector['sector_code'],
+                max_stocks=5,
+                strict_mode=True  # 严格模式：技术面条件不达标则跳过
+            )
+            for sector in recommended_sectors
+        ]
     
-    for sector in recommended_sectors:
+    for sector, future in zip(recommended_sectors, futures):
         print(f"\n📁 板块: {sector['sector_name']} ({sector.get('strength', sector.get('trend', '未知'))})")
         print(f"  风险等级: {sector.get('risk_level', 'medium')} | 推荐: {sector.get('recommendation', '关注')}")
         print(f"  推荐理由: {sector.get('reason', '综合评分较高')}")
         
-        # 使用筛选器分析该板块个股
-        stocks = stock_filter.filter_stocks_in_sector(
-            sector['sector_code'], 
-            max_stocks=5,
-            strict_mode=True  # 严格模式：技术面条件不达标则跳过
-        )
+        stocks = future.result()
         
         if not stocks:
             print("  ⚠️  未找到符合条件的个股")
@@ -170,9 +186,12 @@ def main():
             df = pd.DataFrame(all_recommended_stocks)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # 保存完整数据
-            df.to_csv(f"results/recommendations_{timestamp}.csv", 
-                     index=False, encoding='utf-8-sig')
+            RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+            recommendations_path = RESULTS_DIR / f"recommendations_{timestamp}.csv"
+            
+            # 保存完整数据（转换一次 Arrow 表，完整版与简化版共用）
+            table = to_arrow_table(df)
+            write_csv(df, recommendations_path, table=table)
             
             # 保存简化版
             simple_cols = ['symbol', 'name', 'price', 'change_pct', 
@@ -180,11 +199,10 @@ def main():
                           'stop_loss', 'rank_reasons']
             
             if all(col in df.columns for col in simple_cols):
-                df_simple = df[simple_cols]
-                df_simple.to_csv(f"results/simple_recommendations_{timestamp}.csv", 
-                               index=False, encoding='utf-8-sig')
+                write_csv(df, RESULTS_DIR / f"simple_recommendations_{timestamp}.csv",
+                          columns=simple_cols, table=table)
             
-            logger.info(f"结果已保存至 results/recommendations_{timestamp}.csv")
+            logger.info(f"结果已保存至 {recommendations_path}")
         else:
             print("\n⚠️  今日未找到符合短线稳健策略的个股")
             print("建议：1. 放宽筛选条件 2. 关注其他板块 3. 保持观望")
@@ -2,15 +2,20 @@
 短线稳健策略执行系统 - 实时动态板块版
 基于AKShare实时板块数据，快速分析市场热点
 """
-import yaml
+import os
+import sys
 import logging
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from src.data.data_fetcher import ShortTermDataFetcher
 from src.core.dynamic_sector_analyzer_v2 import OptimizedDynamicSectorAnalyzer
 from src.core.stock_filter import StockFilter
 from src.strategy.trading_decision import ShortTermTradingDecision
 from src.strategy.position_sizer import PositionManager
+from src.data.csv_writer import write_csv, to_arrow_table
+from src.utils.config_loader import load_yaml
 
 # 配置日志
 logging.basicConfig(
@@ -19,11 +24,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 板块/个股报告输出：只输出消息本身（不带时间和级别前缀），
+# 批量运行时可将其级别调到 WARNING 以上关闭明细输出
+report_logger = logging.getLogger(f"{__name__}.report")
+if not report_logger.handlers:
+    _report_handler = logging.StreamHandler(sys.stdout)
+    _report_handler.setFormatter(logging.Formatter('%(message)s'))
+    report_logger.addHandler(_report_handler)
+    report_logger.propagate = False
+    report_logger.setLevel(logging.INFO)
+
+CONFIG_PATH = 'config/sectors.yaml'
+SECTOR_FILTER_WORKERS = 8  # 板块并发筛选的最大线程数
+WRITE_BUFFER_SIZE = 1 << 20  # 交易计划文件写缓冲（1MB）
+RESULTS_DIR = Path("results")  # 结果输出目录
+
 def load_config():
-    """加载配置文件"""
+    """加载配置文件（返回副本，调用方修改不会污染缓存）"""
     try:
-        with open('config/sectors.yaml', 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_yaml(CONFIG_PATH)
     except FileNotFoundError:
         # 如果配置文件不存在，使用默认配置
         return {
@@ -64,41 +83,56 @@ def analyze_stocks_in_top_sectors(stock_filter, top_sectors, max_stocks_per_sect
     Returns:
         推荐个股列表
     """
-    print("\n🔍 开始在推荐板块中筛选个股...")
-    print("=" * 80)
+    report_logger.info("\n🔍 开始在推荐板块中筛选个股...")
+    report_logger.info("=" * 80)
     
     all_recommended_stocks = []
+    if not top_sectors:
+        return all_recommended_stocks
     
-    for idx, sector in enumerate(top_sectors, 1):
-        print(f"\n📊 [{idx}/{len(top_sectors)}] 分析板块: {sector['sector_name']}")
-        print(f"   强度: {sector['strength']} | 得分: {sector['score']}")
-        print(f"   风险等级: {sector['risk_level']} | 推荐: {sector['recommendation']}")
-        
-        try:
-            # 获取板块成分股并筛选
-            stocks = stock_filter.filter_stocks_in_sector(
-                sector['sector_code'], 
+    # 各板块成分股筛选以网络 I/O 为主，并发提交；输出仍按板块顺序在主线程打印
+    with ThreadPoolExecutor(max_workers=min(SECTOR_FILTER_WORKERS, len(top_sectors))) as executor:
+        futures = [
+            executor.submit(
+                stock_filter.filter_stocks_in_sector,
+                sector['sector_code'],
                 max_stocks=max_stocks_per_sector,
                 strict_mode=False  # 先使用宽松模式
             )
+            for sector in top_sectors
+        ]
+    
+    verbose = report_logger.isEnabledFor(logging.INFO)
+    for idx, (sector, future) in enumerate(zip(top_sectors, futures), 1):
+        report_logger.info("\n📊 [%d/%d] 分析板块: %s", idx, len(top_sectors), sector['sector_name'])
+        report_logger.info("   强度: %s | 得分: %s", sector['strength'], sector['score'])
+        report_logger.info("   风险等级: %s | 推荐: %s", sector['risk_level'], sector['recommendation'])
+        
+        try:
+            # 获取板块成分股筛选结果
+            stocks = future.result()
             
             if not stocks:
-                print(f"   ⚠️  未找到符合条件的个股")
+                report_logger.info("   ⚠️  未找到符合条件的个股")
                 continue
             
-            print(f"   ✅  找到 {len(stocks)} 只潜力个股:")
+            report_logger.info("   ✅  找到 %d 只潜力个股:", len(stocks))
             
             for stock in stocks:
-                print(f"      • {stock['name']} ({stock['symbol']})")
-                print(f"        评分: {stock['total_score']} | 价格: {stock['price']:.2f} | 涨幅: {stock['change_pct']:.2f}%")
-                print(f"        信号: {stock['entry_signal']} | 止损: {stock['stop_loss']:.2f}")
-                
                 # 生成交易决策
                 buy_signal = ShortTermTradingDecision.get_buy_signal(stock)
-                if buy_signal['suggested_action'] != '观望':
-                    low, high = buy_signal['buy_price_range']
-                    print(f"        操作: {buy_signal['suggested_action']} | 买入区间: {low:.2f}-{high:.2f}")
-                    print(f"        目标: {buy_signal['target_price']:.2f} | 风险收益比: 1:{buy_signal['risk_reward_ratio']:.1f}")
+                
+                if verbose:
+                    report_logger.info("      • %s (%s)", stock['name'], stock['symbol'])
+                    report_logger.info("        评分: %s | 价格: %.2f | 涨幅: %.2f%%",
+                                       stock['total_score'], stock['price'], stock['change_pct'])
+                    report_logger.info("        信号: %s | 止损: %.2f", stock['entry_signal'], stock['stop_loss'])
+                    if buy_signal['suggested_action'] != '观望':
+                        low, high = buy_signal['buy_price_range']
+                        report_logger.info("        操作: %s | 买入区间: %.2f-%.2f",
+                                           buy_signal['suggested_action'], low, high)
+                        report_logger.info("        目标: %.2f | 风险收益比: 1:%.1f",
+                                           buy_signal['target_price'], buy_signal['risk_reward_ratio'])
                 
                 # 添加板块信息
                 stock['sector_name'] = sector['sector_name']
@@ -111,138 +145,155 @@ def analyze_stocks_in_top_sectors(stock_filter, top_sectors, max_stocks_per_sect
                 all_recommended_stocks.append(stock)
                 
         except Exception as e:
-            print(f"   ❌  分析板块 {sector['sector_name']} 时出错: {e}")
+            report_logger.error("   ❌  分析板块 %s 时出错: %s", sector['sector_name'], e)
             continue
     
     return all_recommended_stocks
 
+def _iter_trading_plans(all_stocks):
+    """逐只生成交易计划文本片段（计划之间以分隔线隔开），供流式写入文件"""
+    separator = "\n" + "="*80 + "\n"
+    for idx, stock in enumerate(all_stocks):
+        if idx:
+            yield "\n"
+        yield ShortTermTradingDecision.generate_trading_plan(stock)
+        yield "\n"
+        yield separator
+
 def save_results(all_stocks, top_sectors, sector_analyzer):
     """保存分析结果"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    sector_data_path = RESULTS_DIR / f"sector_data_{timestamp}.csv"
+    top_sectors_path = RESULTS_DIR / f"top_sectors_{timestamp}.csv"
+    recommended_stocks_path = RESULTS_DIR / f"recommended_stocks_{timestamp}.csv"
+    trading_plans_path = RESULTS_DIR / f"trading_plans_{timestamp}.txt"
+    stocks_simple_path = RESULTS_DIR / f"stocks_simple_{timestamp}.csv"
     
     # 1. 保存板块分析结果
     sector_data = sector_analyzer.get_real_time_sector_data()
     if not sector_data.empty:
-        sector_data.to_csv(f"results/sector_data_{timestamp}.csv", 
-                          index=False, encoding='utf-8-sig')
-        print(f"✅ 板块数据已保存: results/sector_data_{timestamp}.csv")
+        write_csv(sector_data, sector_data_path)
+        print(f"✅ 板块数据已保存: {sector_data_path}")
     
     # 2. 保存推荐板块
     if top_sectors:
         top_sectors_df = pd.DataFrame(top_sectors)
-        top_sectors_df.to_csv(f"results/top_sectors_{timestamp}.csv", 
-                             index=False, encoding='utf-8-sig')
-        print(f"✅ 推荐板块已保存: results/top_sectors_{timestamp}.csv")
+        write_csv(top_sectors_df, top_sectors_path)
+        print(f"✅ 推荐板块已保存: {top_sectors_path}")
     
         # 3. 保存推荐个股
         if all_stocks:
             stocks_df = pd.DataFrame(all_stocks)
             
-            # 展开buy_signal字典为单独列
+            # 展开buy_signal字典为单独列（json_normalize 一次构建，避免逐行 apply(pd.Series)）
             if 'buy_signal' in stocks_df.columns:
-                buy_signals = stocks_df['buy_signal'].apply(pd.Series)
-                buy_signals.columns = [f'buy_{col}' for col in buy_signals.columns]
-                stocks_df = pd.concat([stocks_df.drop('buy_signal', axis=1), buy_signals], axis=1)
+                buy_signals = pd.json_normalize(stocks_df['buy_signal'].tolist(), max_level=0).add_prefix('buy_')
+                buy_signals.index = stocks_df.index
+                stocks_df = pd.concat([stocks_df.drop(columns='buy_signal'), buy_signals], axis=1)
             
             # 排序：先按板块得分，再按个股得分
-            stocks_df = stocks_df.sort_values(['sector_score', 'total_score'], 
-                                             ascending=[False, False])
+            stocks_df.sort_values(['sector_score', 'total_score'], ascending=[False, False],
+                                  inplace=True, ignore_index=True, kind='mergesort')
             
-            stocks_df.to_csv(f"results/recommended_stocks_{timestamp}.csv", 
-                        index=False, encoding='utf-8-sig')
-            print(f"✅ 推荐个股已保存: results/recommended_stocks_{timestamp}.csv")
+            # 完整版和简化版共用一次 DataFrame→Arrow 转换
+            stocks_table = to_arrow_table(stocks_df)
+            write_csv(stocks_df, recommended_stocks_path, table=stocks_table)
+            print(f"✅ 推荐个股已保存: {recommended_stocks_path}")
             
             # 生成详细交易计划文件
-            trading_plans = []
-            for stock in all_stocks:
-                plan = ShortTermTradingDecision.generate_trading_plan(stock)
-                trading_plans.append(plan)
-                trading_plans.append("\n" + "="*80 + "\n")
-            
-            with open(f"results/trading_plans_{timestamp}.txt", 'w', encoding='utf-8') as f:
-                f.write("\n".join(trading_plans))
-            print(f"✅ 交易计划已保存: results/trading_plans_{timestamp}.txt")
+            with open(trading_plans_path, 'w', encoding='utf-8',
+                      buffering=WRITE_BUFFER_SIZE) as f:
+                f.writelines(_iter_trading_plans(all_stocks))
+            print(f"✅ 交易计划已保存: {trading_plans_path}")
         
-        # 简化版
-        simple_cols = ['symbol', 'name', 'sector_name', 'price', 'change_pct',
-                      'total_score', 'entry_signal', 'stop_loss', 'rank_reasons']
-        
-        available_cols = [col for col in simple_cols if col in stocks_df.columns]
-        if available_cols:
-            stocks_simple = stocks_df[available_cols]
-            stocks_simple.to_csv(f"results/stocks_simple_{timestamp}.csv", 
-                               index=False, encoding='utf-8-sig')
-            print(f"✅ 简化版个股列表已保存: results/stocks_simple_{timestamp}.csv")
+            # 简化版
+            simple_cols = ['symbol', 'name', 'sector_name', 'price', 'change_pct',
+                          'total_score', 'entry_signal', 'stop_loss', 'rank_reasons']
+            
+            available_cols = [col for col in simple_cols if col in stocks_df.columns]
+            if available_cols:
+                write_csv(stocks_df, stocks_simple_path,
+                          columns=available_cols, table=stocks_table)
+                print(f"✅ 简化版个股列表已保存: {stocks_simple_path}")
     
     return timestamp
 
 def generate_summary_report(all_stocks, top_sectors):
     """生成总结报告"""
-    print("\n" + "="*100)
-    print("📋 分析总结报告")
-    print("="*100)
+    report_logger.info("\n" + "="*100)
+    report_logger.info("📋 分析总结报告")
+    report_logger.info("="*100)
     
     if not top_sectors:
-        print("⚠️  今日无推荐板块")
+        report_logger.info("⚠️  今日无推荐板块")
+        return
+    
+    # 报告级别被调高（静默批量运行）时跳过整段格式化
+    if not report_logger.isEnabledFor(logging.INFO):
         return
     
-    print(f"\n🎯 市场热点板块（共{len(top_sectors)}个）：")
-    print("-" * 80)
+    report_logger.info("\n🎯 市场热点板块（共%d个）：", len(top_sectors))
+    report_logger.info("-" * 80)
     
     for sector in top_sectors:
         strength_emoji = "🔥" if sector['strength'] in ['强势', '偏强'] else "📊"
         risk_emoji = "⚠️" if sector['risk_level'] == 'high' else "✅"
         
-        print(f"{strength_emoji} {sector['sector_name']}")
-        print(f"   得分: {sector['score']} | 强度: {sector['strength']} | 风险: {risk_emoji} {sector['risk_level']}")
-        print(f"   理由: {sector['reason']}")
+        report_logger.info("%s %s", strength_emoji, sector['sector_name'])
+        report_logger.info("   得分: %s | 强度: %s | 风险: %s %s",
+                           sector['score'], sector['strength'], risk_emoji, sector['risk_level'])
+        report_logger.info("   理由: %s", sector['reason'])
     
     if all_stocks:
-        print(f"\n📈 推荐个股汇总（共{len(all_stocks)}只）：")
-        print("-" * 80)
+        report_logger.info("\n📈 推荐个股汇总（共%d只）：", len(all_stocks))
+        report_logger.info("-" * 80)
         
-        # 按板块分组显示
-        stocks_by_sector = {}
-        for stock in all_stocks:
-            sector_name = stock.get('sector_name', '未知板块')
-            if sector_name not in stocks_by_sector:
-                stocks_by_sector[sector_name] = []
-            stocks_by_sector[sector_name].append(stock)
+        # 按板块分组显示（分组和组内排序交给 pandas，只遍历每组前3个）
+        stocks_df = pd.DataFrame(all_stocks)
+        if 'sector_name' in stocks_df.columns:
+            stocks_df['sector_name'] = stocks_df['sector_name'].fillna('未知板块')
+        else:
+            stocks_df['sector_name'] = '未知板块'
+        sector_meta = {s['sector_name']: s for s in top_sectors}
         
-        for sector_name, stocks in stocks_by_sector.items():
+        for sector_name, group in stocks_df.groupby('sector_name', sort=False):
             # 查找板块信息
-            sector_info = next((s for s in top_sectors if s['sector_name'] == sector_name), None)
+            sector_info = sector_meta.get(sector_name)
             sector_score = sector_info['score'] if sector_info else 0
             
-            print(f"\n📍 {sector_name} (板块得分: {sector_score})")
+            report_logger.info("\n📍 %s (板块得分: %s)", sector_name, sector_score)
             
-            for stock in sorted(stocks, key=lambda x: x['total_score'], reverse=True)[:3]:  # 只显示前3个
+            for stock in group.nlargest(3, 'total_score').to_dict('records'):  # 只显示前3个
                 score_emoji = "⭐" if stock['total_score'] >= 70 else "📈"
-                print(f"   {score_emoji} {stock['name']} ({stock['symbol']})")
-                print(f"      评分: {stock['total_score']} | 价格: {stock['price']:.2f} | 涨幅: {stock['change_pct']:.2f}%")
-                print(f"      信号: {stock['entry_signal']}")
+                report_logger.info("   %s %s (%s)", score_emoji, stock['name'], stock['symbol'])
+                report_logger.info("      评分: %s | 价格: %.2f | 涨幅: %.2f%%",
+                                   stock['total_score'], stock['price'], stock['change_pct'])
+                report_logger.info("      信号: %s", stock['entry_signal'])
                 
                 # 显示交易建议
-                if 'buy_signal' in stock:
-                    buy_signal = stock['buy_signal']
+                buy_signal = stock.get('buy_signal')
+                if isinstance(buy_signal, dict):
                     if buy_signal['suggested_action'] != '观望':
                         low, high = buy_signal['buy_price_range']
-                        print(f"      操作: {buy_signal['suggested_action']} | 买入区间: {low:.2f}-{high:.2f}")
-                        print(f"      持有: {buy_signal['holding_days']}天 | 目标: {buy_signal['target_price']:.2f}")
+                        report_logger.info("      操作: %s | 买入区间: %.2f-%.2f",
+                                           buy_signal['suggested_action'], low, high)
+                        report_logger.info("      持有: %s天 | 目标: %.2f",
+                                           buy_signal['holding_days'], buy_signal['target_price'])
         
-        print("\n💡 操作建议:")
-        print("  1. 优先关注评分≥70的个股")
-        print("  2. 关注强势板块（🔥标记）")
-        print("  3. 控制高风险板块的仓位（⚠️标记）")
-        print("  4. 严格执行止损纪律")
-        print("\n⏰ 操作时机:")
-        print("  • 买入时机：次日开盘后30-60分钟（9:45-10:15）")
-        print("  • 买入价格：在建议区间内分批买入")
-        print("  • 持有周期：3-10个交易日")
-        print("  • 止损纪律：亏损超过3-5%坚决卖出")
+        report_logger.info("\n💡 操作建议:")
+        report_logger.info("  1. 优先关注评分≥70的个股")
+        report_logger.info("  2. 关注强势板块（🔥标记）")
+        report_logger.info("  3. 控制高风险板块的仓位（⚠️标记）")
+        report_logger.info("  4. 严格执行止损纪律")
+        report_logger.info("\n⏰ 操作时机:")
+        report_logger.info("  • 买入时机：次日开盘后30-60分钟（9:45-10:15）")
+        report_logger.info("  • 买入价格：在建议区间内分批买入")
+        report_logger.info("  • 持有周期：3-10个交易日")
+        report_logger.info("  • 止损纪律：亏损超过3-5%坚决卖出")
     else:
-        print("\n⚠️  今日未找到符合策略的个股")
-        print("建议：1. 放宽筛选条件 2. 关注其他板块 3. 保持观望")
+        report_logger.info("\n⚠️  今日未找到符合策略的个股")
+        report_logger.info("建议：1. 放宽筛选条件 2. 关注其他板块 3. 保持观望")
 
 def main():
     """主函数"""
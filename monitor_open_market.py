@@ -10,10 +10,11 @@
 from __future__ import annotations
 
 import argparse
-import json
+import fnmatch
 import os
 import sys
-from datetime import datetime, time as dtime
+from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List
 
 import numpy as np
@@ -26,17 +27,50 @@ if PROJECT_ROOT not in sys.path:
 
 from src.monitor.open_market_monitor import OpenMarketMonitor
 from src.monitor.open_decision_maker import OpenDecisionMaker
+from src.data.csv_writer import write_csv
+from src.data.json_writer import write_json
+
+
+# 盘前分析 CSV 中实际用到的列：读取时跳过其余列，并直接指定类型免去推断
+# （symbol 按字符串读取，保留 000001 这类代码的前导零）
+PRE_MARKET_TEXT_COLUMNS = {
+    "symbol": str,
+    "name": str,
+    "sector_name": str,
+    "sector": str,
+    "entry_signal": str,
+    "buy_buy_price_range": str,
+}
+PRE_MARKET_NUMERIC_COLUMNS = {
+    "total_score": "float64",
+    "stop_loss": "float64",
+    "buy_target_price": "float64",
+    "price": "float64",
+    "buy_position_size": "float64",
+}
+
+# 开盘监控结果输出目录（相对运行目录，与 results/ 一致）
+MONITOR_RESULTS_DIR = Path("monitor_results")
+
+# 买入区间文本（如 "(9.8, 10.2)"）中的下限与可选上限。
+# 数值前不能紧跟字母/数字/小数点，避免 NumPy 2 的 "(np.float64(9.8), np.float64(10.2))"
+# 里把 float64 的 "64" 当成价格
+PRICE_RANGE_PATTERN = r"(?<![\w.])(?P<low>\d*\.?\d+)(?:.*?(?<![\w.])(?P<high>\d*\.?\d+))?"
 
 
 def _find_latest_csv(results_dir: str, patterns: List[str]) -> str | None:
-    import glob
-
-    files: List[str] = []
-    for p in patterns:
-        files.extend(glob.glob(os.path.join(results_dir, p)))
-    if not files:
-        return None
-    return max(files, key=os.path.getctime)
+    """单次 scandir 遍历目录，内存中匹配文件名模式，返回创建时间最新的文件"""
+    best: str | None = None
+    best_ctime = -1.0
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not any(fnmatch.fnmatchcase(name, p) for p in patterns) or not entry.is_file():
+                continue
+            ctime = entry.stat().st_ctime
+            if ctime > best_ctime:
+                best_ctime, best = ctime, entry.path
+    return best
 
 
 def load_pre_market_analysis(results_dir: str = "results") -> Dict[str, Any] | None:
@@ -44,6 +78,8 @@ def load_pre_market_analysis(results_dir: str = "results") -> Dict[str, Any] | N
     从 results/ 读取最近一次盘前分析输出。
     优先读取 main_realtime.py 产出的 recommended_stocks_*.csv；
     如果不存在，则退回 simple_recommendations_*.csv / recommendations_*.csv。
+
+    股票列表以 DataFrame 形式放在 recommended_stocks_df 中，由调用方截断后再转为 dict 列表。
     """
     if not os.path.exists(results_dir):
         print("结果目录不存在，请先运行盘前分析（例如 main_realtime.py）")
@@ -63,68 +99,89 @@ def load_pre_market_analysis(results_dir: str = "results") -> Dict[str, Any] | N
         return None
 
     print(f"加载盘前分析文件: {latest}")
-    df = pd.read_csv(latest, encoding="utf-8-sig")
+    usecols = PRE_MARKET_TEXT_COLUMNS.keys() | PRE_MARKET_NUMERIC_COLUMNS.keys()
+    try:
+        df = pd.read_csv(
+            latest,
+            encoding="utf-8-sig",
+            usecols=lambda c: c in usecols,
+            dtype={**PRE_MARKET_TEXT_COLUMNS, **PRE_MARKET_NUMERIC_COLUMNS},
+        )
+    except ValueError:
+        # 数值列混入了非数字内容时，交给下面的 to_numeric(errors="coerce") 处理
+        df = pd.read_csv(latest, encoding="utf-8-sig", usecols=lambda c: c in usecols, dtype=PRE_MARKET_TEXT_COLUMNS)
     if df.empty:
         print("盘前分析文件为空")
         return None
 
-    # 规范化字段
-    def _to_float(x: Any, default: float = 0.0) -> float:
-        v = pd.to_numeric(x, errors="coerce")
-        return float(v) if pd.notna(v) else default
-
-    watchlist: List[Dict[str, Any]] = []
-    for _, row in df.iterrows():
-        symbol = str(row.get("symbol", "")).strip()
-        if not symbol:
-            continue
-        watchlist.append(
-            {
-                "symbol": symbol,
-                "name": str(row.get("name", "")).strip(),
-                "sector_name": str(row.get("sector_name", row.get("sector", ""))).strip(),
-                "pre_market_score": _to_float(row.get("total_score", 0)),
-                "pre_market_signal": str(row.get("entry_signal", "")).strip(),
-                "stop_loss": _to_float(row.get("stop_loss", 0)),
-                "target_price": _to_float(row.get("buy_target_price", 0), default=0.0)
-                or (_to_float(row.get("price", 0)) * 1.08),
-                # 若 CSV 里存在展开后的 buy_* 字段，则带上
-                "buy_price_range": (
-                    _to_float(row.get("buy_buy_price_range", 0), default=0.0),
-                    _to_float(row.get("buy_buy_price_range", 0), default=0.0),
-                ),
-                "position_size": _to_float(row.get("buy_position_size", 0.05), default=0.05),
-            }
-        )
+    # 规范化字段（整列处理，避免 iterrows 逐行构造 Series）
+    def _num_col(col: str, default: float = 0.0) -> pd.Series:
+        if col not in df.columns:
+            return pd.Series(default, index=df.index, dtype=float)
+        return pd.to_numeric(df[col], errors="coerce").fillna(default).astype(float)
+
+    def _text_col(col: str) -> pd.Series:
+        if col not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[col].fillna("").astype(str).str.strip()
+
+    sector_col = "sector_name" if "sector_name" in df.columns else "sector"
+    target_price = _num_col("buy_target_price")
+    # 若 CSV 里存在展开后的 buy_* 字段，则带上
+    # buy_buy_price_range 形如 "(9.8, 10.2)"，一次正则提取出上下限；只有单个数值时上下限相同
+    if "buy_buy_price_range" in df.columns:
+        bounds = df["buy_buy_price_range"].astype(str).str.extract(PRICE_RANGE_PATTERN)
+        buy_low = pd.to_numeric(bounds["low"], errors="coerce")
+        buy_high = pd.to_numeric(bounds["high"], errors="coerce").fillna(buy_low)
+        buy_low, buy_high = buy_low.fillna(0.0), buy_high.fillna(0.0)
+    else:
+        buy_low = buy_high = pd.Series(0.0, index=df.index, dtype=float)
+    normalized = pd.DataFrame(
+        {
+            "symbol": _text_col("symbol"),
+            "name": _text_col("name"),
+            "sector_name": _text_col(sector_col),
+            "pre_market_score": _num_col("total_score"),
+            "pre_market_signal": _text_col("entry_signal"),
+            "stop_loss": _num_col("stop_loss"),
+            "target_price": target_price.where(target_price != 0, _num_col("price") * 1.08),
+            "buy_price_range": list(zip(buy_low.tolist(), buy_high.tolist())),
+            "position_size": _num_col("buy_position_size", default=0.05),
+        }
+    )
+    normalized = normalized[normalized["symbol"] != ""].reset_index(drop=True)
 
-    return {"file": os.path.basename(latest), "recommended_stocks": watchlist, "total_stocks": len(watchlist)}
+    return {"file": os.path.basename(latest), "recommended_stocks_df": normalized, "total_stocks": len(normalized)}
+
+
+# 开盘监控窗口 9:30-9:45（当日秒数，直接做整数比较）
+MONITOR_WINDOW_START = 9 * 3600 + 30 * 60
+MONITOR_WINDOW_END = 9 * 3600 + 45 * 60
 
 
 def check_market_time(force: bool) -> bool:
-    now = datetime.now().time()
-    start = dtime(9, 30)
-    end = dtime(9, 45)
-    if now < start:
+    now = datetime.now()
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
+    if seconds < MONITOR_WINDOW_START:
         print(f"当前时间 {now.strftime('%H:%M')}，未到开盘监控窗口（9:30-9:45）")
         return False
-    if now > end and not force:
+    if seconds > MONITOR_WINDOW_END and not force:
         print(f"当前时间 {now.strftime('%H:%M')}，已过最佳监控窗口（9:30-9:45）")
         print("可使用 --force 强制运行（不交互）")
         return False
-    if now > end and force:
+    if seconds > MONITOR_WINDOW_END and force:
         print(f"当前时间 {now.strftime('%H:%M')}，已过最佳窗口，但将继续运行（--force）")
     return True
 
 
 def save_results(instructions: Dict[str, Any], monitor_results: Dict[str, Any]) -> str:
     ts = datetime.now().strftime("%Y%m%d_%H%M")
-    out_dir = "monitor_results"
-    os.makedirs(out_dir, exist_ok=True)
+    MONITOR_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
     # JSON
-    json_path = os.path.join(out_dir, f"trading_instructions_{ts}.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"instructions": instructions, "monitor_results": monitor_results}, f, ensure_ascii=False, indent=2, default=str)
+    json_path = MONITOR_RESULTS_DIR / f"trading_instructions_{ts}.json"
+    payload = {"instructions": instructions, "monitor_results": monitor_results}
+    write_json(payload, json_path)
     print(f"已保存: {json_path}")
 
     # CSV 汇总
@@ -136,19 +193,30 @@ def save_results(instructions: Dict[str, Any], monitor_results: Dict[str, Any])
             all_rows.append(rr)
     if all_rows:
         df = pd.DataFrame(all_rows)
-        csv_path = os.path.join(out_dir, f"all_instructions_{ts}.csv")
-        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+        csv_path = MONITOR_RESULTS_DIR / f"all_instructions_{ts}.csv"
+        write_csv(df, csv_path)
         print(f"已保存: {csv_path}")
 
     return ts
 
 
+_PARSER: argparse.ArgumentParser | None = None
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """命令行解析器只构建一次（run_open_monitor.py 会在同一进程内重复调用 main）"""
+    global _PARSER
+    if _PARSER is None:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--force", action="store_true", help="超过 9:45 也继续运行（不交互）")
+        parser.add_argument("--max-monitor", type=int, default=20, help="最多监控股票数量（默认 20）")
+        parser.add_argument("--interval", type=int, default=30, help="刷新间隔秒（默认 30）")
+        _PARSER = parser
+    return _PARSER
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--force", action="store_true", help="超过 9:45 也继续运行（不交互）")
-    parser.add_argument("--max-monitor", type=int, default=20, help="最多监控股票数量（默认 20）")
-    parser.add_argument("--interval", type=int, default=30, help="刷新间隔秒（默认 30）")
-    args = parser.parse_args()
+    args = _get_parser().parse_args()
 
     print("=" * 90)
     print("短线策略 - 开盘实时监控系统")
@@ -163,10 +231,13 @@ def main() -> None:
         print("无法加载盘前分析，退出")
         return
 
-    watchlist = pre["recommended_stocks"]
-    if len(watchlist) > args.max_monitor:
-        print(f"监控列表过大({len(watchlist)})，截断为前 {args.max_monitor} 只")
-        watchlist = watchlist[: args.max_monitor]
+    stocks_df = pre["recommended_stocks_df"]
+    if len(stocks_df) > args.max_monitor:
+        print(f"监控列表过大({len(stocks_df)})，截断为前 {args.max_monitor} 只")
+        stocks_df = stocks_df.head(args.max_monitor)
+    # 监控器和决策器都按 dict 逐只访问，截断后才转换，只为实际监控的股票构建 dict
+    watchlist: List[Dict[str, Any]] = stocks_df.to_dict(orient="records")
+    pre["recommended_stocks"] = watchlist
 
     print(f"\n📊 准备监控 {len(watchlist)} 只股票")
     print(f"⏱️  监控时长: 15分钟 | 检查间隔: {args.interval}秒")
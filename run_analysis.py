@@ -1,12 +1,14 @@
 """
 快捷分析脚本 - 一键运行不同时间段的分析
 """
-import subprocess
-import sys
 import os
 from datetime import datetime, time
 import argparse
 
+from src.utils.script_runner import run_script
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def get_current_session():
     """获取当前时间段"""
     now = datetime.now().time()
@@ -44,27 +46,12 @@ def run_analysis(session_type=None):
     print(f"🎯 运行 {session_type} 分析")
     print(f"⏰ 当前时间: {datetime.now().strftime('%H:%M:%S')}")
     
-    # 构建命令
-    cmd = [sys.executable, "analyze_anytime.py"]
+    print("\n" + "="*80)
+    print("分析输出:")
+    print("="*80)
     
-    # 运行分析
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-        
-        print("\n" + "="*80)
-        print("分析输出:")
-        print("="*80)
-        print(result.stdout)
-        
-        if result.stderr:
-            print("\n错误信息:")
-            print(result.stderr)
-        
-        return result.returncode == 0
-        
-    except Exception as e:
-        print(f"❌ 运行失败: {e}")
-        return False
+    # 优先在当前进程内运行，无法导入时改用子进程
+    return run_script(os.path.join(SCRIPT_DIR, "analyze_anytime.py"), [])
 
 def main():
     """主函数"""
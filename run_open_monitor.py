@@ -8,10 +8,14 @@
 from __future__ import annotations
 
 import os
-import subprocess
-import sys
 from datetime import datetime
 
+from src.utils.script_runner import run_script
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRIGGER_WINDOW_START = 9 * 60 + 28
+TRIGGER_WINDOW_END = 9 * 60 + 50
+
 
 def run_open_monitor() -> bool:
     now = datetime.now()
@@ -21,31 +25,19 @@ def run_open_monitor() -> bool:
         print(f"非交易日（周末）：{now.strftime('%Y-%m-%d %H:%M:%S')}，跳过")
         return False
 
-    # 建议 9:28-9:50 之间触发
-    if not (now.hour == 9 and 28 <= now.minute <= 50):
+    # 建议 9:28-9:50 之间触发（按当日分钟数比较）
+    minute_of_day = now.hour * 60 + now.minute
+    if not (TRIGGER_WINDOW_START <= minute_of_day <= TRIGGER_WINDOW_END):
         print(f"非建议触发时间：{now.strftime('%H:%M')}，跳过")
         return False
 
-    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "monitor_open_market.py")
+    script_path = os.path.join(SCRIPT_DIR, "monitor_open_market.py")
     print(f"开始执行: {script_path}")
+    print("=" * 90)
+    print("输出:")
 
-    try:
-        result = subprocess.run(
-            [sys.executable, script_path, "--force"],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-        )
-        print("=" * 90)
-        print("输出:")
-        print(result.stdout)
-        if result.stderr:
-            print("错误输出:")
-            print(result.stderr)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"执行失败: {e}")
-        return False
+    # 优先在当前进程内运行，无法导入时改用子进程
+    return run_script(script_path, ["--force"])
 
 
 if __name__ == "__main__":
@@ -6,9 +6,169 @@ import numpy as np
 from datetime import datetime, time, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
+import bisect
+import numbers
+import time as ttime
+from dataclasses import dataclass, fields
+
+from src.utils.jit import jit
 
 logger = logging.getLogger(__name__)
 
+HISTORY_CACHE_TTL_TRADING = 60     # 盘中历史数据缓存有效期（秒）
+HISTORY_CACHE_TTL_CLOSED = 3600    # 非交易时段历史数据缓存有效期（秒）
+
+
+FEATURE_WINDOW = 20  # 各模式评分用到的最长回看窗口（MA20）
+
+
+@dataclass
+class CloseFeatures:
+    """
+    一批股票的收盘价特征（各字段为逐行对应的数组），每批只计算一次，供各模式评分复用
+    
+    length: 每只股票的实际K线数
+    last: 最新收盘价
+    change_1d / change_5d: 最新价相对倒数第2/5根收盘价的涨跌幅(%)
+    ma10 / ma20: 最近10/20日均线（窗口内有 NaN 时为 NaN，与 rolling 一致）
+    """
+    length: np.ndarray
+    last: np.ndarray
+    change_1d: np.ndarray
+    change_5d: np.ndarray
+    ma10: np.ndarray
+    ma20: np.ndarray
+    
+    def subset(self, mask: np.ndarray) -> 'CloseFeatures':
+        """按布尔掩码筛选出部分股票的特征"""
+        return CloseFeatures(**{f.name: getattr(self, f.name)[mask] for f in fields(self)})
+
+
+def _close_features(closes: List[np.ndarray], window: int = FEATURE_WINDOW) -> CloseFeatures:
+    """将多只股票的收盘价右对齐堆叠为 (N, window) 矩阵（不足部分补 NaN），一次性计算评分特征"""
+    matrix = np.full((len(closes), window), np.nan)
+    lengths = np.zeros(len(closes), dtype=int)
+    for i, values in enumerate(closes):
+        tail = values[-window:]
+        if len(tail):
+            matrix[i, -len(tail):] = tail
+        lengths[i] = len(values)
+    
+    last = matrix[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_1d = (last / matrix[:, -2] - 1) * 100
+        change_5d = (last / matrix[:, -5] - 1) * 100
+    
+    return CloseFeatures(
+        length=lengths,
+        last=last,
+        change_1d=change_1d,
+        change_5d=change_5d,
+        ma10=matrix[:, -10:].mean(axis=1),
+        ma20=matrix[:, -20:].mean(axis=1),
+    )
+
+
+@dataclass
+class AnalysisBatch:
+    """一批股票的评分结果（结构数组：逐行对应的代码、名称、评分），输出时才组装成 dict"""
+    symbols: List[str]
+    names: List[str]
+    scores: np.ndarray
+    
+    @classmethod
+    def from_stocks(cls, stocks: List[Dict], scores: np.ndarray) -> 'AnalysisBatch':
+        return cls(
+            symbols=[stock['symbol'] for stock in stocks],
+            names=[stock.get('name', '') for stock in stocks],
+            scores=scores,
+        )
+    
+    def to_records(self, score_key: str, ranked: bool = False) -> List[Dict]:
+        """
+        组装为结果列表
+        
+        Args:
+            score_key: 评分字段名（如 trend_score / closing_score）
+            ranked: 是否按评分从高到低排列（稳定排序，同分保持原顺序）
+        """
+        order = _rank_desc(self.scores) if ranked else range(len(self.symbols))
+        return [
+            {'symbol': self.symbols[i], 'name': self.names[i], score_key: int(self.scores[i])}
+            for i in order
+        ]
+
+
+def _rank_desc(scores: np.ndarray) -> np.ndarray:
+    """评分从高到低的行号（稳定排序，与 sorted(..., reverse=True) 的同分顺序一致）"""
+    return np.argsort(-np.asarray(scores), kind='stable')
+
+
+def _analysis_time() -> str:
+    """当前时间的 HH:MM 文本（直接拼接时、分，省去 strftime 的格式解析）"""
+    now = datetime.now()
+    return f"{now.hour:02d}:{now.minute:02d}"
+
+
+def _count_above(scores: np.ndarray, threshold: float) -> int:
+    """评分高于阈值的股票数（NumPy 的 C 循环比较并计数，不逐个访问结果 dict）"""
+    return int(np.count_nonzero(scores > threshold))
+
+
+@jit
+def opening_score_batch(length, last, change_5d, ma20):
+    """开盘模式评分内核：近5日涨幅 + 是否站上 MA20"""
+    n = length.shape[0]
+    scores = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        score = 50
+        if change_5d[i] > 2:
+            score += 20
+        elif change_5d[i] > 0:
+            score += 10
+        if length[i] >= 20 and last[i] > ma20[i]:
+            score += 15
+        scores[i] = min(100, score)
+    return scores
+
+
+@jit
+def morning_score_batch(length, last, change_pct, ma10):
+    """上午模式评分内核：当日涨跌幅阶梯 + 是否站上 MA10"""
+    n = length.shape[0]
+    scores = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        score = 50
+        if change_pct[i] > 5:
+            score += 35
+        elif change_pct[i] > 3:
+            score += 25
+        elif change_pct[i] > 1:
+            score += 15
+        elif change_pct[i] > 0:
+            score += 5
+        if length[i] >= 10 and last[i] > ma10[i]:
+            score += 20
+        scores[i] = min(100, score)
+    return scores
+
+
+@jit
+def daily_score_batch(length, last, change_5d, ma20):
+    """全天表现评分内核：站上 MA20 + 5日动量（均需至少20根K线）"""
+    n = length.shape[0]
+    scores = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        score = 50
+        if length[i] >= 20:
+            if last[i] > ma20[i]:
+                score += 20
+            if change_5d[i] > 3:
+                score += 15
+        scores[i] = min(100, score)
+    return scores
+
+
 class TimePatternAnalyzer:
     """时间模式分析器"""
     
@@ -23,26 +183,61 @@ class TimePatternAnalyzer:
         'post_market': (time(15, 0), time(21, 0)),       # 盘后分析
         'pre_market': (time(21, 0), time(9, 30))         # 盘前预判
     }
+    # 各时段起点（当日分钟数，升序）与对应模式，供 bisect 查找；早于首个起点的时间属于跨夜的 pre_market
+    _SESSION_STARTS = tuple(start.hour * 60 + start.minute for start, _ in MARKET_SESSIONS.values())
+    _SESSION_MODES = tuple(MARKET_SESSIONS)
+    
+    # 模式 -> 分析方法名（类级分派表，未知模式走通用分析）
+    _ANALYZERS = {
+        'morning_open': '_analyze_morning_open',
+        'morning_mid': '_analyze_morning_mid',
+        'noon_break': '_analyze_noon_break',
+        'afternoon_early': '_analyze_afternoon_early',
+        'afternoon_mid': '_analyze_afternoon_mid',
+        'closing': '_analyze_closing',
+        'post_market': '_analyze_post_market',
+        'pre_market': '_analyze_pre_market',
+        'weekend_analysis': '_analyze_weekend',
+        'general_analysis': '_analyze_general'
+    }
     
     def __init__(self, data_fetcher):
         self.data_fetcher = data_fetcher
-        self.current_mode = self._get_current_mode()
-        
+        # 当前模式按自然分钟缓存；_mode_override 为手动指定的模式（赋值 current_mode 时设置）
+        self._cached_mode: Optional[str] = None
+        self._cached_mode_minute: Optional[int] = None
+        self._mode_override: Optional[str] = None
+        # 历史数据缓存：{(symbol, period): DataFrame}，时间桶变化时整体失效
+        self._hist_cache: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._hist_cache_bucket: Optional[int] = None
+        
+    @property
+    def current_mode(self) -> str:
+        """当前分析模式（每分钟最多重新计算一次，长时间运行时也能随时段切换）"""
+        if self._mode_override is not None:
+            return self._mode_override
+        minute = int(ttime.time() // 60)
+        if self._cached_mode_minute != minute:
+            self._cached_mode = self._get_current_mode()
+            self._cached_mode_minute = minute
+        return self._cached_mode
+    
+    @current_mode.setter
+    def current_mode(self, mode: Optional[str]):
+        """手动指定分析模式（不再随时间切换），赋值 None 恢复按时间自动判断"""
+        self._mode_override = mode
+    
     def _get_current_mode(self) -> str:
         """获取当前时间对应的分析模式"""
-        now = datetime.now().time()
-        current_date = datetime.now()
+        now = datetime.now()
         
         # 检查是否交易日
-        weekday = current_date.weekday()
-        if weekday >= 5:  # 周末
+        if now.weekday() >= 5:  # 周末
             return 'weekend_analysis'
         
-        for mode, (start, end) in self.MARKET_SESSIONS.items():
-            if start <= now < end:
-                return mode
-        
-        return 'general_analysis'
+        # 各时段首尾相接，按起点二分即可定位；idx 为 -1 时（9:30 前）取最后一个时段，即跨夜的盘前
+        idx = bisect.bisect_right(self._SESSION_STARTS, now.hour * 60 + now.minute) - 1
+        return self._SESSION_MODES[idx]
     
     def analyze_current_market(self, watchlist: List[Dict]) -> Dict:
         """
@@ -57,45 +252,95 @@ class TimePatternAnalyzer:
         mode = self.current_mode
         logger.info(f"当前分析模式: {mode}")
         
-        analysis_methods = {
-            'morning_open': self._analyze_morning_open,
-            'morning_mid': self._analyze_morning_mid,
-            'noon_break': self._analyze_noon_break,
-            'afternoon_early': self._analyze_afternoon_early,
-            'afternoon_mid': self._analyze_afternoon_mid,
-            'closing': self._analyze_closing,
-            'post_market': self._analyze_post_market,
-            'pre_market': self._analyze_pre_market,
-            'weekend_analysis': self._analyze_weekend,
-            'general_analysis': self._analyze_general
-        }
-        
-        method = analysis_methods.get(mode, self._analyze_general)
+        method = getattr(self, self._ANALYZERS.get(mode, '_analyze_general'))
         return method(watchlist)
     
-    def _analyze_morning_open(self, watchlist: List[Dict]) -> Dict:
-        """分析开盘30分钟"""
-        logger.info("分析模式: 开盘30分钟 (9:30-10:00)")
+    def _fetch_histories(self, symbols: List[str], period: str = '1mo') -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        逐只获取多只股票的历史数据（BaoStock 底层是单个全局连接，请求只能串行）
+        
+        评分只用到收盘价，有 close 列时只保留这一列（缓存中也不再持有整张 OHLCV 表）
+        
+        Returns:
+            {symbol: DataFrame}，获取失败的股票对应 None
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return {}
+        
+        # 同一时间桶内重复分析直接复用已下载的数据（盘中 60 秒，非交易时段 1 小时）
+        bucket = self._history_cache_bucket()
+        if bucket != self._hist_cache_bucket:
+            self._hist_cache.clear()
+            self._hist_cache_bucket = bucket
+        
+        histories = {symbol: self._hist_cache.get((symbol, period)) for symbol in unique_symbols}
+        missing = [symbol for symbol, hist in histories.items() if hist is None]
+        if not missing:
+            return histories
+        
+        for symbol in missing:
+            try:
+                hist = self.data_fetcher.get_stock_history(symbol, period=period)
+            except Exception as e:
+                logger.error(f"获取 {symbol} 历史数据失败: {e}")
+                continue
+            if hist is not None and 'close' in hist.columns:
+                hist = hist[['close']]
+            histories[symbol] = hist
+            if hist is not None:
+                self._hist_cache[(symbol, period)] = hist
+        return histories
+    
+    @staticmethod
+    def _history_cache_bucket() -> int:
+        """当前所处的缓存时间桶编号"""
+        now = datetime.now()
+        trading = now.weekday() < 5 and time(9, 30) <= now.time() <= time(15, 0)
+        ttl = HISTORY_CACHE_TTL_TRADING if trading else HISTORY_CACHE_TTL_CLOSED
+        return int(ttime.time() // ttl)
+    
+    def _load_batch(self, watchlist: List[Dict], period: str = '1mo') -> Tuple[List[Dict], CloseFeatures]:
+        """
+        获取监控列表的历史数据，并将有数据的股票批量转换为收盘价特征
+        
+        Returns:
+            (有数据的股票列表, 与之逐行对应的特征数组)
+        """
+        if not watchlist:
+            # 空列表直接返回空批次，各模式据此给出“无数据”的结果
+            return [], _close_features([])
         
-        analysis_results = []
+        histories = self._fetch_histories([stock['symbol'] for stock in watchlist], period=period)
         
-        for stock in watchlist:  # 分析全部股票
+        stocks: List[Dict] = []
+        closes: List[np.ndarray] = []
+        for stock in watchlist:
+            hist_data = histories.get(stock['symbol'])
+            if hist_data is None or hist_data.empty:
+                continue
             try:
-                # 获取历史数据作为参考（实际应获取实时分时数据）
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_opening_pattern(hist_data, stock)
-                    analysis_results.append(analysis)
-                    
+                # float64 列直接取底层数组视图（只读使用，不复制）；其他类型才转换
+                closes.append(hist_data['close'].to_numpy(dtype=float, copy=False))
+                stocks.append(stock)
             except Exception as e:
                 logger.error(f"分析股票 {stock.get('name', 'N/A')} 失败: {e}")
         
+        return stocks, _close_features(closes)
+    
+    def _analyze_morning_open(self, watchlist: List[Dict]) -> Dict:
+        """分析开盘30分钟"""
+        logger.info("分析模式: 开盘30分钟 (9:30-10:00)")
+        
+        # 获取历史数据作为参考（实际应获取实时分时数据）
+        stocks, features = self._load_batch(watchlist, period='1mo')  # 分析全部股票
+        analysis_results, scores = self._analyze_opening_pattern(stocks, features)
+        
         return {
             'mode': 'morning_open',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '开盘强势股识别、资金流向判断',
-            'recommendation': self._generate_opening_recommendation(analysis_results),
+            'recommendation': self._generate_opening_recommendation(scores),
             'stocks_analyzed': len(analysis_results),
             'results': analysis_results
         }
@@ -104,470 +349,310 @@ class TimePatternAnalyzer:
         """分析上午盘中(10:00-11:30)"""
         logger.info("分析模式: 上午盘中 (10:00-11:30)")
         
-        analysis_results = []
-        
-        for stock in watchlist:
-            try:
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_morning_pattern(hist_data, stock)
-                    analysis_results.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        analysis_results, scores = self._analyze_morning_pattern(stocks, features)
         
         return {
             'mode': 'morning_mid',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '上午趋势确认、回调机会识别',
-            'recommendation': self._generate_mid_morning_recommendation(analysis_results),
+            'recommendation': self._generate_mid_morning_recommendation(scores),
             'stocks_analyzed': len(analysis_results),
-            'results': sorted(analysis_results, key=lambda x: x.get('score', 0), reverse=True)
+            'results': [analysis_results[i] for i in _rank_desc(scores)]
         }
     
     def _analyze_noon_break(self, watchlist: List[Dict]) -> Dict:
         """分析午间休市(11:30-13:00)"""
         logger.info("分析模式: 午间休市 (11:30-13:00)")
         
-        morning_summary = []
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        morning_summary, scores = self._analyze_morning_pattern(stocks, features)
+        # 上涨家数只统计一次，供预判和推荐共用
+        up_count = _count_above(scores, 60)  # trend == 'up'
         
-        for stock in watchlist:
-            try:
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_morning_performance(hist_data, stock)
-                    morning_summary.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
-        
-        afternoon_outlook = self._predict_afternoon_outlook(morning_summary)
+        afternoon_outlook = self._predict_afternoon_outlook(up_count, len(scores))
         
         return {
             'mode': 'noon_break',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '上午总结、下午走势预判',
             'morning_summary': morning_summary,
             'afternoon_outlook': afternoon_outlook,
-            'recommendation': self._generate_noon_recommendation(morning_summary, afternoon_outlook)
+            'recommendation': self._generate_noon_recommendation(up_count, len(scores), afternoon_outlook)
         }
     
     def _analyze_afternoon_early(self, watchlist: List[Dict]) -> Dict:
         """分析下午开盘(13:00-14:00)"""
         logger.info("分析模式: 下午开盘 (13:00-14:00)")
         
-        analysis_results = []
-        
-        for stock in watchlist:
-            try:
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_afternoon_open_pattern(hist_data, stock)
-                    analysis_results.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        analysis_results, scores = self._analyze_morning_pattern(stocks, features)
+        for analysis in analysis_results:
+            analysis['afternoon_score'] = analysis['score']
         
         return {
             'mode': 'afternoon_early',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '下午开盘走势、上午强势股延续性',
-            'recommendation': self._generate_afternoon_open_recommendation(analysis_results),
+            'recommendation': self._generate_afternoon_open_recommendation(scores),
             'stocks_analyzed': len(analysis_results),
-            'results': sorted(analysis_results, key=lambda x: x.get('afternoon_score', 0), reverse=True)
+            'results': [analysis_results[i] for i in _rank_desc(scores)]
         }
     
     def _analyze_afternoon_mid(self, watchlist: List[Dict]) -> Dict:
         """分析下午盘中(14:00-14:30)"""
         logger.info("分析模式: 下午盘中 (14:00-14:30)")
         
-        analysis_results = []
-        
-        for stock in watchlist:
-            try:
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_afternoon_mid_pattern(hist_data, stock)
-                    analysis_results.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        batch = self._analyze_afternoon_mid_pattern(stocks, features)
+        analysis_results = batch.to_records('trend_score', ranked=True)
         
         return {
             'mode': 'afternoon_mid',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '全天趋势确认、尾盘机会识别',
-            'recommendation': self._generate_afternoon_mid_recommendation(analysis_results),
+            'recommendation': self._generate_afternoon_mid_recommendation(batch.scores),
             'stocks_analyzed': len(analysis_results),
-            'results': sorted(analysis_results, key=lambda x: x.get('trend_score', 0), reverse=True)
+            'results': analysis_results
         }
     
     def _analyze_closing(self, watchlist: List[Dict]) -> Dict:
         """分析尾盘(14:30-15:00)"""
         logger.info("分析模式: 尾盘30分钟 (14:30-15:00)")
         
-        analysis_results = []
-        
-        for stock in watchlist:
-            try:
-                hist_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if hist_data is not None and not hist_data.empty:
-                    analysis = self._analyze_closing_pattern(hist_data, stock)
-                    analysis_results.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        batch = self._analyze_closing_pattern(stocks, features)
+        analysis_results = batch.to_records('closing_score', ranked=True)
         
         return {
             'mode': 'closing',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '尾盘抢筹/抛售、次日预判',
-            'recommendation': self._generate_closing_recommendation(analysis_results),
+            'recommendation': self._generate_closing_recommendation(batch.scores),
             'stocks_analyzed': len(analysis_results),
-            'results': sorted(analysis_results, key=lambda x: x.get('closing_score', 0), reverse=True)
+            'results': analysis_results
         }
     
     def _analyze_post_market(self, watchlist: List[Dict]) -> Dict:
         """分析盘后(15:00后)"""
         logger.info("分析模式: 盘后分析 (15:00后)")
         
-        daily_analysis = []
-        
-        for stock in watchlist:
-            try:
-                daily_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if daily_data is not None and not daily_data.empty:
-                    analysis = self._analyze_daily_performance(daily_data, stock)
-                    daily_analysis.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        daily_analysis, scores = self._analyze_daily_performance(stocks, features)
+        good_count = _count_above(scores, 65)
         
         return {
             'mode': 'post_market',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '全天复盘、技术指标分析、次日策略',
             'daily_summary': daily_analysis[:20],
-            'tomorrow_outlook': self._predict_tomorrow_outlook(daily_analysis),
-            'recommendation': self._generate_post_market_recommendation(daily_analysis)
+            'tomorrow_outlook': self._predict_tomorrow_outlook(good_count, len(scores)),
+            'recommendation': self._generate_post_market_recommendation(good_count, len(scores))
         }
     
     def _analyze_pre_market(self, watchlist: List[Dict]) -> Dict:
         """分析盘前(前一日21:00-次日9:30)"""
         logger.info("分析模式: 盘前预判 (夜盘/早盘)")
         
-        previous_day_analysis = []
-        
-        for stock in watchlist:
-            try:
-                previous_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if previous_data is not None and not previous_data.empty:
-                    analysis = self._analyze_pre_market_pattern(previous_data, stock)
-                    previous_day_analysis.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        previous_day_analysis, scores = self._analyze_daily_performance(stocks, features)
+        good_count = _count_above(scores, 65)
         
         return {
             'mode': 'pre_market',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '隔夜消息、技术形态、当日策略',
             'stock_analysis': previous_day_analysis,
-            'opening_prediction': self._predict_opening_impact(previous_day_analysis),
-            'recommendation': self._generate_pre_market_recommendation(previous_day_analysis)
+            'opening_prediction': self._predict_opening_impact(good_count, len(scores)),
+            'recommendation': self._generate_pre_market_recommendation(good_count, len(scores))
         }
     
     def _analyze_weekend(self, watchlist: List[Dict]) -> Dict:
         """分析周末"""
         logger.info("分析模式: 周末分析")
         
-        weekly_analysis = []
-        
-        for stock in watchlist:
-            try:
-                weekly_data = self.data_fetcher.get_stock_history(stock['symbol'], period='3mo')
-                
-                if weekly_data is not None and not weekly_data.empty:
-                    analysis = self._analyze_weekly_pattern(weekly_data, stock)
-                    weekly_analysis.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='3mo')
+        weekly_analysis, patterns = self._analyze_weekly_pattern(stocks, features)
+        up_trend = int(np.count_nonzero(patterns == '上升趋势'))
         
         return {
             'mode': 'weekend_analysis',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '周线分析、技术形态、下周策略',
             'weekly_analysis': weekly_analysis,
-            'next_week_outlook': self._predict_next_week_outlook(weekly_analysis),
-            'recommendation': self._generate_weekend_recommendation(weekly_analysis)
+            'next_week_outlook': self._predict_next_week_outlook(up_trend, len(patterns)),
+            'recommendation': self._generate_weekend_recommendation(up_trend, len(patterns))
         }
     
     def _analyze_general(self, watchlist: List[Dict]) -> Dict:
         """通用分析（其他时间）"""
         logger.info("分析模式: 通用分析")
         
-        general_analysis = []
-        
-        for stock in watchlist:
-            try:
-                recent_data = self.data_fetcher.get_stock_history(stock['symbol'], period='1mo')
-                
-                if recent_data is not None and not recent_data.empty:
-                    analysis = self._analyze_general_pattern(recent_data, stock)
-                    general_analysis.append(analysis)
-                    
-            except Exception as e:
-                logger.error(f"分析失败: {e}")
+        stocks, features = self._load_batch(watchlist, period='1mo')
+        batch = self._analyze_general_pattern(stocks, features)
+        general_analysis = batch.to_records('opportunity_score', ranked=True)
         
         return {
             'mode': 'general_analysis',
-            'analysis_time': datetime.now().strftime('%H:%M'),
+            'analysis_time': _analysis_time(),
             'focus': '近期走势、技术指标、买卖点',
-            'results': sorted(general_analysis, key=lambda x: x.get('opportunity_score', 0), reverse=True),
-            'recommendation': self._generate_general_recommendation(general_analysis)
+            'results': general_analysis,
+            'recommendation': self._generate_general_recommendation(batch.scores)
         }
     
-    # 以下是分析辅助方法
-    def _analyze_opening_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析开盘模式"""
-        if hist_data.empty or len(hist_data) < 5:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': 0}
-        
-        closes = hist_data['close']
-        score = 50
-        
-        # 最近5日表现
-        if len(closes) >= 5:
-            change_5d = (closes.iloc[-1] / closes.iloc[-5] - 1) * 100
-            if change_5d > 2:
-                score += 20
-            elif change_5d > 0:
-                score += 10
-        
-        # 均线位置
-        if len(closes) >= 20:
-            ma20 = closes.rolling(20).mean().iloc[-1]
-            if closes.iloc[-1] > ma20:
-                score += 15
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'score': min(100, score),
-            'opening_change': round(change_5d, 2) if 'change_5d' in locals() else 0,
-            'signal': '强势' if score > 70 else '一般' if score > 60 else '弱势'
-        }
-    
-    def _analyze_morning_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析上午模式"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': 50, 'change_pct': 0}
-        
-        closes = hist_data['close']
-        score = 50
-        change_pct = 0
-        
+    # 以下是分析辅助方法（按整批股票向量化计算，features 与 stocks 逐行对应）
+    def _analyze_opening_pattern(self, stocks: List[Dict], features: CloseFeatures) -> Tuple[List[Dict], np.ndarray]:
+        """分析开盘模式，返回 (结果列表, 逐行评分数组)"""
+        n = features.length
+        # 最近5日表现 + 均线位置
+        change_5d = features.change_5d
+        score = opening_score_batch(n, features.last, change_5d, features.ma20)
+        score[n < 5] = 0  # 数据不足5天不评分
+        opening_change = np.round(change_5d, 2)
+        
+        results = []
+        for i, stock in enumerate(stocks):
+            if n[i] < 5:
+                results.append({'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': 0})
+                continue
+            s = int(score[i])
+            results.append({
+                'symbol': stock['symbol'],
+                'name': stock.get('name', ''),
+                'score': s,
+                'opening_change': opening_change[i],
+                'signal': '强势' if s > 70 else '一般' if s > 60 else '弱势'
+            })
+        return results, score
+    
+    def _analyze_morning_pattern(self, stocks: List[Dict], features: CloseFeatures) -> Tuple[List[Dict], np.ndarray]:
+        """分析上午模式，返回 (结果列表, 逐行评分数组)"""
         # 计算涨跌幅（使用监控列表中的实时数据，如果没有则用历史数据计算）
-        if stock.get('change_pct'):
-            change_pct = stock.get('change_pct', 0)
-        elif len(closes) >= 2:
-            # 用历史数据计算（昨日到今日的变化）
-            change_pct = (closes.iloc[-1] / closes.iloc[-2] - 1) * 100
+        # 用历史数据计算时取昨日到今日的变化
+        realtime_change = []
+        valid = np.ones(len(stocks), dtype=bool)
+        for i, stock in enumerate(stocks):
+            value = stock.get('change_pct')
+            if value and not isinstance(value, numbers.Real):
+                logger.error(f"分析失败: {stock['symbol']} 的 change_pct 不是数值: {value!r}")
+                valid[i] = False
+            realtime_change.append(value)
+        if not valid.all():
+            stocks = [stock for stock, ok in zip(stocks, valid) if ok]
+            realtime_change = [value for value, ok in zip(realtime_change, valid) if ok]
+            features = features.subset(valid)
+        
+        n = features.length
+        has_realtime = np.array([bool(v) for v in realtime_change], dtype=bool)
+        hist_change = np.where(n >= 2, features.change_1d, 0.0)
+        change_pct = np.where(has_realtime,
+                              np.array([v if v else 0.0 for v in realtime_change], dtype=float),
+                              hist_change)
         
         # 根据涨跌幅调整评分
-        if change_pct > 5:
-            score += 35
-        elif change_pct > 3:
-            score += 25
-        elif change_pct > 1:
-            score += 15
-        elif change_pct > 0:
-            score += 5
+        score = morning_score_batch(n, features.last, change_pct, features.ma10)
         
-        if len(closes) >= 10:
-            ma10 = closes.rolling(10).mean().iloc[-1]
-            if closes.iloc[-1] > ma10:
-                score += 20
+        # 历史涨跌幅整批取两位小数；实时值保持原类型，逐个 round
+        hist_rounded = np.round(hist_change, 2)
         
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'score': min(100, score),
-            'change_pct': round(change_pct, 2),
-            'trend': 'up' if score > 60 else 'down',
-            'signal': '强势' if score > 75 else '一般' if score > 55 else '弱势'
-        }
-    
-    def _analyze_morning_performance(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析上午表现"""
-        return self._analyze_morning_pattern(hist_data, stock)
-    
-    def _analyze_afternoon_open_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析下午开盘模式"""
-        analysis = self._analyze_morning_pattern(hist_data, stock)
-        analysis['afternoon_score'] = analysis.get('score', 50)
-        return analysis
-    
-    def _analyze_afternoon_mid_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
+        results = []
+        for i, stock in enumerate(stocks):
+            s = int(score[i])
+            if has_realtime[i]:
+                change = round(realtime_change[i], 2)
+            else:
+                change = hist_rounded[i] if n[i] >= 2 else 0
+            results.append({
+                'symbol': stock['symbol'],
+                'name': stock.get('name', ''),
+                'score': s,
+                'change_pct': change,
+                'trend': 'up' if s > 60 else 'down',
+                'signal': '强势' if s > 75 else '一般' if s > 55 else '弱势'
+            })
+        return results, score
+    
+    def _analyze_afternoon_mid_pattern(self, stocks: List[Dict], features: CloseFeatures) -> AnalysisBatch:
         """分析下午盘中模式"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'trend_score': 50}
+        score = 50 + np.where((features.length >= 20) & (features.last > features.ma20), 25, 0)
+        score = np.minimum(100, score)
         
-        closes = hist_data['close']
-        score = 50
-        
-        if len(closes) >= 20:
-            ma20 = closes.rolling(20).mean().iloc[-1]
-            current = closes.iloc[-1]
-            if current > ma20:
-                score += 25
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'trend_score': min(100, score)
-        }
+        return AnalysisBatch.from_stocks(stocks, score)
     
-    def _analyze_closing_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
+    def _analyze_closing_pattern(self, stocks: List[Dict], features: CloseFeatures) -> AnalysisBatch:
         """分析尾盘模式"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'closing_score': 50}
-        
-        closes = hist_data['close']
-        score = 50
-        
         # 尾盘通常关注全天表现
-        if len(closes) >= 5:
-            change = (closes.iloc[-1] / closes.iloc[-5] - 1) * 100
-            if change > 1:
-                score += 20
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'closing_score': min(100, score)
-        }
-    
-    def _analyze_daily_performance(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析全天表现"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': 50}
-        
-        closes = hist_data['close']
-        score = 50
-        
-        if len(closes) >= 20:
-            ma20 = closes.rolling(20).mean().iloc[-1]
-            current = closes.iloc[-1]
-            
-            if current > ma20:
-                score += 20
-            
-            # 动量
-            if len(closes) >= 5:
-                momentum = (current / closes.iloc[-5] - 1) * 100
-                if momentum > 3:
-                    score += 15
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'score': min(100, score),
-            'trend': 'up' if score > 60 else 'down'
-        }
-    
-    def _analyze_pre_market_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析盘前模式"""
-        return self._analyze_daily_performance(hist_data, stock)
-    
-    def _analyze_weekly_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
-        """分析周线模式"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': 50, 'pattern': 'unknown'}
-        
-        closes = hist_data['close']
-        score = 50
-        
-        if len(closes) >= 20:
-            ma20 = closes.rolling(20).mean().iloc[-1]
-            if closes.iloc[-1] > ma20:
-                score += 25
-                pattern = '上升趋势'
-            else:
-                pattern = '下降趋势'
-        else:
-            pattern = '震荡'
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'score': min(100, score),
-            'pattern': pattern
-        }
-    
-    def _analyze_general_pattern(self, hist_data: pd.DataFrame, stock: Dict) -> Dict:
+        score = 50 + np.where((features.length >= 5) & (features.change_5d > 1), 20, 0)
+        score = np.minimum(100, score)
+        
+        return AnalysisBatch.from_stocks(stocks, score)
+    
+    def _analyze_daily_performance(self, stocks: List[Dict], features: CloseFeatures) -> Tuple[List[Dict], np.ndarray]:
+        """分析全天表现，返回 (结果列表, 逐行评分数组)"""
+        # 均线位置 + 动量
+        score = daily_score_batch(features.length, features.last, features.change_5d, features.ma20)
+        
+        results = [
+            {
+                'symbol': stock['symbol'],
+                'name': stock.get('name', ''),
+                'score': int(s),
+                'trend': 'up' if s > 60 else 'down'
+            }
+            for stock, s in zip(stocks, score)
+        ]
+        return results, score
+    
+    def _analyze_weekly_pattern(self, stocks: List[Dict], features: CloseFeatures) -> Tuple[List[Dict], np.ndarray]:
+        """分析周线模式，返回 (结果列表, 逐行形态数组)"""
+        has_ma20 = features.length >= 20
+        above_ma20 = has_ma20 & (features.last > features.ma20)
+        score = np.minimum(100, 50 + np.where(above_ma20, 25, 0))
+        pattern = np.where(above_ma20, '上升趋势', np.where(has_ma20, '下降趋势', '震荡'))
+        
+        results = [
+            {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'score': int(s), 'pattern': str(p)}
+            for stock, s, p in zip(stocks, score, pattern)
+        ]
+        return results, pattern
+    
+    def _analyze_general_pattern(self, stocks: List[Dict], features: CloseFeatures) -> AnalysisBatch:
         """分析通用模式"""
-        if hist_data.empty:
-            return {'symbol': stock['symbol'], 'name': stock.get('name', ''), 'opportunity_score': 50}
+        score = 50 + np.where((features.length >= 10) & (features.last > features.ma10), 20, 0)
+        score = np.minimum(100, score)
         
-        closes = hist_data['close']
-        score = 50
-        
-        if len(closes) >= 10:
-            ma10 = closes.rolling(10).mean().iloc[-1]
-            if closes.iloc[-1] > ma10:
-                score += 20
-        
-        return {
-            'symbol': stock['symbol'],
-            'name': stock.get('name', ''),
-            'opportunity_score': min(100, score)
-        }
+        return AnalysisBatch.from_stocks(stocks, score)
     
     # 推荐生成方法
-    def _generate_opening_recommendation(self, results: List[Dict]) -> str:
+    def _generate_opening_recommendation(self, scores: np.ndarray) -> str:
         """生成开盘推荐"""
-        if not results:
+        if not len(scores):
             return "无数据，建议观望"
         
-        strong_stocks = [r for r in results if r.get('score', 0) > 70]
+        strong_count = _count_above(scores, 70)
         
-        if len(strong_stocks) >= 3:
-            return f"开盘强势，建议关注前{min(3, len(strong_stocks))}只强势股"
-        elif len(strong_stocks) >= 1:
+        if strong_count >= 3:
+            return f"开盘强势，建议关注前{min(3, strong_count)}只强势股"
+        elif strong_count >= 1:
             return "局部强势，可选择性操作"
         else:
             return "开盘偏弱，建议谨慎"
     
-    def _generate_mid_morning_recommendation(self, results: List[Dict]) -> str:
+    def _generate_mid_morning_recommendation(self, scores: np.ndarray) -> str:
         """生成上午盘中推荐"""
-        if not results:
+        if not len(scores):
             return "无数据，建议观望"
         
-        up_count = len([r for r in results if r.get('trend') == 'up'])
-        total = len(results)
+        up_count = _count_above(scores, 60)  # trend == 'up'
+        total = len(scores)
         
         if up_count / total > 0.6:
             return "上午趋势良好，可寻找回调买入机会"
         else:
             return "上午分化明显，建议谨慎操作"
     
-    def _generate_noon_recommendation(self, morning_summary: List[Dict], outlook: Dict) -> str:
+    def _generate_noon_recommendation(self, up_count: int, total: int, outlook: Dict) -> str:
         """生成午间推荐"""
-        if not morning_summary:
-            return "无数据，建议观望"
-        
-        up_count = len([s for s in morning_summary if s.get('trend') == 'up'])
-        total = len(morning_summary)
-        
         if total == 0:
             return "无数据，建议观望"
         
@@ -580,76 +665,70 @@ class TimePatternAnalyzer:
         else:
             return "上午偏弱，下午可能调整，建议观望"
     
-    def _generate_afternoon_open_recommendation(self, results: List[Dict]) -> str:
+    def _generate_afternoon_open_recommendation(self, scores: np.ndarray) -> str:
         """生成下午开盘推荐"""
-        if not results:
+        if not len(scores):
             return "无数据，建议观望"
         
-        strong = len([r for r in results if r.get('afternoon_score', 0) > 65])
+        strong = _count_above(scores, 65)
         
         if strong >= 3:
             return "下午开盘延续强势，可关注"
         else:
             return "下午开盘偏弱，建议观望"
     
-    def _generate_afternoon_mid_recommendation(self, results: List[Dict]) -> str:
+    def _generate_afternoon_mid_recommendation(self, scores: np.ndarray) -> str:
         """生成下午盘中推荐"""
-        if not results:
+        if not len(scores):
             return "无数据，建议观望"
         
         return "下午盘中，关注尾盘机会"
     
-    def _generate_closing_recommendation(self, results: List[Dict]) -> str:
+    def _generate_closing_recommendation(self, scores: np.ndarray) -> str:
         """生成尾盘推荐"""
-        if not results:
+        if not len(scores):
             return "无数据，建议观望"
         
         return "尾盘谨慎操作，关注异动股票"
     
-    def _generate_post_market_recommendation(self, daily_analysis: List[Dict]) -> str:
+    def _generate_post_market_recommendation(self, good_count: int, total: int) -> str:
         """生成盘后推荐"""
-        if not daily_analysis:
+        if total == 0:
             return "无数据，建议观望"
         
-        good_stocks = [s for s in daily_analysis if s.get('score', 0) > 65]
-        
-        if len(good_stocks) >= 5:
-            return f"市场表现良好，{len(good_stocks)}只股票技术面向好，可关注"
-        elif len(good_stocks) >= 2:
+        if good_count >= 5:
+            return f"市场表现良好，{good_count}只股票技术面向好，可关注"
+        elif good_count >= 2:
             return "市场分化，可精选个股操作"
         else:
             return "市场偏弱，建议谨慎"
     
-    def _generate_pre_market_recommendation(self, previous_day_analysis: List[Dict]) -> str:
+    def _generate_pre_market_recommendation(self, good: int, total: int) -> str:
         """生成盘前推荐"""
-        if not previous_day_analysis:
+        if total == 0:
             return "无数据，建议观望"
         
-        good = len([s for s in previous_day_analysis if s.get('score', 0) > 65])
-        
         if good >= 3:
             return f"技术面良好，{good}只股票值得关注"
         else:
             return "技术面一般，建议谨慎"
     
-    def _generate_weekend_recommendation(self, weekly_analysis: List[Dict]) -> str:
+    def _generate_weekend_recommendation(self, up_trend: int, total: int) -> str:
         """生成周末推荐"""
-        if not weekly_analysis:
+        if total == 0:
             return "无数据，建议观望"
         
-        up_trend = len([s for s in weekly_analysis if s.get('pattern') == '上升趋势'])
-        
         if up_trend >= 5:
             return f"周线趋势良好，{up_trend}只股票处于上升趋势"
         else:
             return "周线趋势一般，建议精选个股"
     
-    def _generate_general_recommendation(self, general_analysis: List[Dict]) -> str:
+    def _generate_general_recommendation(self, scores: np.ndarray) -> str:
         """生成通用推荐"""
-        if not general_analysis:
+        if not len(scores):
             return "无数据，建议观望"
         
-        opportunities = len([s for s in general_analysis if s.get('opportunity_score', 0) > 60])
+        opportunities = _count_above(scores, 60)
         
         if opportunities >= 3:
             return f"发现{opportunities}个操作机会，可关注"
@@ -657,14 +736,11 @@ class TimePatternAnalyzer:
             return "机会有限，建议观望"
     
     # 预测方法
-    def _predict_afternoon_outlook(self, morning_summary: List[Dict]) -> Dict:
+    def _predict_afternoon_outlook(self, up_count: int, total: int) -> Dict:
         """预测下午走势"""
-        if not morning_summary:
+        if total == 0:
             return {'trend': 'neutral', 'confidence': 0.5}
         
-        up_count = len([s for s in morning_summary if s.get('trend') == 'up'])
-        total = len(morning_summary)
-        
         if up_count / total > 0.6:
             return {'trend': 'bullish', 'confidence': 0.7}
         elif up_count / total > 0.4:
@@ -672,40 +748,31 @@ class TimePatternAnalyzer:
         else:
             return {'trend': 'bearish', 'confidence': 0.7}
     
-    def _predict_tomorrow_outlook(self, daily_analysis: List[Dict]) -> Dict:
+    def _predict_tomorrow_outlook(self, good: int, total: int) -> Dict:
         """预测明日走势"""
-        if not daily_analysis:
+        if total == 0:
             return {'trend': 'neutral', 'confidence': 0.5}
         
-        good = len([s for s in daily_analysis if s.get('score', 0) > 65])
-        total = len(daily_analysis)
-        
         if good / total > 0.5:
             return {'trend': 'bullish', 'confidence': 0.65}
         else:
             return {'trend': 'neutral', 'confidence': 0.6}
     
-    def _predict_next_week_outlook(self, weekly_analysis: List[Dict]) -> Dict:
+    def _predict_next_week_outlook(self, up: int, total: int) -> Dict:
         """预测下周走势"""
-        if not weekly_analysis:
+        if total == 0:
             return {'trend': 'neutral', 'confidence': 0.5}
         
-        up = len([s for s in weekly_analysis if s.get('pattern') == '上升趋势'])
-        total = len(weekly_analysis)
-        
         if up / total > 0.5:
             return {'trend': 'bullish', 'confidence': 0.65}
         else:
             return {'trend': 'neutral', 'confidence': 0.6}
     
-    def _predict_opening_impact(self, previous_day_analysis: List[Dict]) -> Dict:
+    def _predict_opening_impact(self, good: int, total: int) -> Dict:
         """预测开盘影响"""
-        if not previous_day_analysis:
+        if total == 0:
             return {'impact': 'neutral', 'strength': 0.5}
         
-        good = len([s for s in previous_day_analysis if s.get('score', 0) > 65])
-        total = len(previous_day_analysis)
-        
         if good / total > 0.5:
             return {'impact': 'positive', 'strength': 0.7}
         else:
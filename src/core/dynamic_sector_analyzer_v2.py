@@ -7,16 +7,180 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import logging
+import os
+import re
+import time
+from pathlib import Path
+
+from src.utils.jit import jit
+
+try:
+    import pyarrow  # type: ignore  # noqa: F401  (pandas 的 parquet 引擎)
+except Exception:
+    pyarrow = None  # Optional dependency
 
 logger = logging.getLogger(__name__)
 
+# 标准化后的实时板块数据落盘缓存（多个进程共享，有效期同 cache_ttl）
+SECTOR_CACHE_FILE = Path("cache") / "sector_realtime.parquet"
+
+# AKShare 板块表列名 -> 标准列名（同一标准列有多个别名时按顺序取第一个存在的列）
+SECTOR_COLUMN_ALIASES = {
+    'sector_name': ('板块名称', '名称'),
+    'sector_code': ('板块代码', '代码'),
+    'price': ('最新价',),
+    'change_pct': ('涨跌幅', '涨跌额'),
+    'up_count': ('上涨家数',),
+    'down_count': ('下跌家数',),
+    'total_market_cap': ('总市值',),
+    'turnover_rate': ('换手率',),
+    'leader_change_pct': ('领涨股票-涨跌幅',),
+}
+
+SECTOR_NUMERIC_COLUMNS = ['price', 'change_pct', 'up_count', 'down_count',
+                          'total_market_cap', 'turnover_rate', 'leader_change_pct']
+
+
+def _map_sector_columns(columns: pd.Index) -> Dict[str, str]:
+    """
+    生成 {原列名: 标准列名} 映射，按原表列顺序排列
+    
+    注意“领涨股票-涨跌幅”是领涨股的涨跌幅，只映射为 leader_change_pct，不会当作板块涨跌幅。
+    """
+    present = set(columns)
+    sources = {}
+    for canonical, aliases in SECTOR_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in present:
+                sources[alias] = canonical
+                break
+    return {col: sources[col] for col in columns if col in sources}
+
+
+# 风险等级关键词（按顺序匹配，先命中者优先；均未命中为 medium）
+RISK_KEYWORDS = [
+    ('low', ['银行', '煤炭', '电力', '公用事业', '食品', '饮料', '保险', '证券']),
+    ('high', ['半导体', '软件', '互联网', '科技', '芯片', '人工智能', 'AI', '生物', '游戏', '传媒']),
+    ('medium', ['医药', '医疗', '化工', '机械', '汽车', '有色', '金属', '制造', '材料']),
+]
+
+# 板块类别关键词（按顺序匹配，先命中者优先；均未命中为 other）
+CATEGORY_KEYWORDS = [
+    ('technology', ['半导体', '软件', '计算机', '互联网', '科技', '芯片', '人工智能', 'AI', '游戏', '通信']),  # 科技成长类
+    ('consumer', ['食品', '饮料', '酿酒', '家电', '汽车', '旅游', '酒店', '商贸', '零售']),  # 消费类
+    ('cyclical', ['有色', '金属', '煤炭', '化工', '石油', '钢铁', '建材', '水泥', '玻璃']),  # 周期类
+    ('finance', ['银行', '保险', '证券', '房地产', '多元金融']),  # 金融地产类
+    ('medical', ['医药', '医疗', '生物', '中药', '制药', '器械', '健康']),  # 医药医疗类
+]
+
+# 风险等级 / 板块类别均为低基数字符串列，存为带固定类别的 Categorical
+RISK_LEVEL_DTYPE = pd.CategoricalDtype(['low', 'medium', 'high'])
+SECTOR_CATEGORY_DTYPE = pd.CategoricalDtype([label for label, _ in CATEGORY_KEYWORDS] + ['other'])
+
+# 综合得分的风险等级系数（未知等级按 1.0）
+RISK_ADJUSTMENT = {
+    'low': 1.05,   # 低风险加分
+    'medium': 1.00,
+    'high': 0.95    # 高风险减分
+}
+
+
+def _keyword_regex(keywords: List[str]) -> re.Pattern:
+    """把关键词列表编译为一个 | 连接的正则（关键词按字面匹配）"""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+# 动量/广度/关注度得分的输入列及其线性变换参数：score = clip((x - center) * slope + base, 0, 100)
+LINEAR_SCORE_COLUMNS = ('change_pct', 'up_ratio', 'turnover_rate')
+_LINEAR_SCORE_FILL = np.array([0.0, 50.0, 2.0])     # 缺失值填充（换手率以 2% 为基准）
+_LINEAR_SCORE_CENTER = np.array([0.0, 0.0, 2.0])
+_LINEAR_SCORE_SLOPE = np.array([10.0, 1.0, 10.0])   # 涨跌幅/换手率每 1% 对应 10 分，上涨比例直接作为得分
+_LINEAR_SCORE_BASE = np.array([50.0, 0.0, 50.0])
+
+# 综合得分分档：[-inf, 45) 弱势 / [45, 55) 偏弱 / [55, 65) 中性 / [65, 75) 偏强 / [75, inf) 强势
+STRENGTH_BINS = np.array([45, 55, 65, 75], dtype=float)
+STRENGTH_LABELS = ('弱势', '偏弱', '中性', '偏强', '强势')
+RECOMMENDATION_LABELS = ('观望', '谨慎关注', '适度关注', '积极关注', '重点关注')
+
+
+@jit
+def _clip(value, low, high):
+    """与 np.clip 一致的标量裁剪（NaN 原样保留）"""
+    if value < low:
+        return low
+    if value > high:
+        return high
+    return value
+
+
+@jit
+def sector_score_batch(linear, market_cap, leader_change, weights, risk_mul):
+    """
+    板块评分内核：一次循环算出四项分项得分和风险调整后的综合得分（未四舍五入）
+    
+    linear 为已填充缺失值的 (N, 3) 涨跌幅/上涨比例/换手率；market_cap、leader_change
+    为空数组表示该列缺失，不计入稳定性得分。运算顺序与逐列 NumPy 写法一致
+    （编译后的 log10 可能与 NumPy 差 1 ulp，恰在取整边界时会影响得分末位）。
+    """
+    n = linear.shape[0]
+    has_cap = market_cap.shape[0] > 0
+    has_leader = leader_change.shape[0] > 0
+    scores = np.empty((n, 4))
+    total = np.empty(n)
+    for i in range(n):
+        # 1-3. 动量、广度、关注度：(x - 基准) * 斜率 + 底分，裁剪到 0-100
+        for j in range(3):
+            v = (linear[i, j] - _LINEAR_SCORE_CENTER[j]) * _LINEAR_SCORE_SLOPE[j] + _LINEAR_SCORE_BASE[j]
+            scores[i, j] = _clip(v, 0.0, 100.0)
+        
+        # 4. 稳定性：市值越大越稳定（100亿市值得50分），领涨股涨幅 5% 左右最理想
+        stability = 50.0
+        if has_cap:
+            stability += _clip((np.log10(market_cap[i]) - 2) * 10, -20.0, 20.0)
+        if has_leader:
+            leader_score = 50 - (abs(leader_change[i]) - 5) * 2
+            stability += (leader_score - 50) * 0.5
+        scores[i, 3] = _clip(stability, 0.0, 100.0)
+        
+        # 5. 加权求和（按 动量、广度、关注度、稳定性 顺序累加）后乘以风险系数
+        t = scores[i, 0] * weights[0] + scores[i, 1] * weights[1]
+        t += scores[i, 2] * weights[2]
+        t += scores[i, 3] * weights[3]
+        total[i] = t * risk_mul[i]
+    return scores, total
+
+
+_RISK_PATTERNS = [(label, _keyword_regex(keywords)) for label, keywords in RISK_KEYWORDS]
+_CATEGORY_PATTERNS = [(label, _keyword_regex(keywords)) for label, keywords in CATEGORY_KEYWORDS]
+
+
+def _classify_names(names: pd.Series, patterns: List[Tuple[str, re.Pattern]], default: str,
+                    dtype: pd.CategoricalDtype) -> pd.Categorical:
+    """
+    按关键词给名称批量打标签：每类一次向量化 str.contains，再用 np.select 取第一个命中类别的编码
+    
+    与逐个名称 str(name).lower() 后依次检查关键词的结果一致。
+    """
+    lowered = names.astype(str).str.lower()
+    conditions = [lowered.str.contains(pattern, na=False).to_numpy(dtype=bool) for _, pattern in patterns]
+    codes = np.select(conditions, [dtype.categories.get_loc(label) for label, _ in patterns],
+                      default=dtype.categories.get_loc(default))
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
 class OptimizedDynamicSectorAnalyzer:
     """优化版动态板块分析器"""
     
     def __init__(self, data_fetcher, config: Dict = None):
         self.data_fetcher = data_fetcher
         self.config = config or self._default_config()
-        self.sector_cache = {}  # 缓存板块数据
+        self.sector_cache = {}  # 缓存板块数据：{'real_time': (获取时刻, DataFrame)}
+        
+        # 配置在实例生命周期内不变：评分权重向量和排除关键词正则只构建一次
+        weights = self.config['score_weights']
+        self._score_weights = np.array([weights['momentum'], weights['breadth'],
+                                        weights['attention'], weights['stability']], dtype=float)
+        exclude_keywords = self.config['exclude_keywords']
+        self._exclude_pattern = _keyword_regex(exclude_keywords) if exclude_keywords else None
         
     def _default_config(self) -> Dict:
         """默认配置"""
@@ -25,6 +189,7 @@ class OptimizedDynamicSectorAnalyzer:
             'max_sectors_to_analyze': 40,
             'top_sectors_to_select': 5,
             'min_sector_score': 50,
+            'cache_ttl': 60,  # 实时板块数据缓存有效期（秒）
             
             # 排除的板块类型（基于名称关键词）
             'exclude_keywords': [
@@ -54,9 +219,19 @@ class OptimizedDynamicSectorAnalyzer:
         这是关键函数，直接使用显示的86个板块数据
         增强版：添加重试机制和降级策略
         """
-        logger.info("获取实时板块数据...")
+        # 有效期内直接返回缓存（同一轮分析中多处调用只请求一次 AKShare）
+        cached = self.sector_cache.get('real_time')
+        if cached is not None and time.monotonic() - cached[0] < self.config.get('cache_ttl', 60):
+            logger.info("使用缓存的实时板块数据")
+            return cached[1].copy()
+        
+        disk_cached = self._load_sector_cache_file()
+        if disk_cached is not None:
+            logger.info("使用磁盘缓存的实时板块数据")
+            self.sector_cache['real_time'] = (time.monotonic(), disk_cached)
+            return disk_cached.copy()
         
-        import time
+        logger.info("获取实时板块数据...")
         
         # 重试3次，每次间隔递增
         for attempt in range(3):
@@ -71,36 +246,9 @@ class OptimizedDynamicSectorAnalyzer:
                     logger.debug(f"板块数据列名: {list(sector_df.columns)}")
                     logger.debug(f"获取到 {len(sector_df)} 个板块")
                     
-                    # 标准化列名（确保一致性）
-                    column_mapping = {}
-                    for col in sector_df.columns:
-                        col_str = str(col)
-                        if '板块名称' in col_str or '名称' in col_str:
-                            column_mapping['sector_name'] = col
-                        elif '板块代码' in col_str or '代码' in col_str:
-                            column_mapping['sector_code'] = col
-                        elif '最新价' in col_str:
-                            column_mapping['price'] = col
-                        elif '涨跌幅' in col_str or '涨跌额' in col_str:
-                            column_mapping['change_pct'] = col
-                        elif '上涨家数' in col_str:
-                            column_mapping['up_count'] = col
-                        elif '下跌家数' in col_str:
-                            column_mapping['down_count'] = col
-                        elif '总市值' in col_str:
-                            column_mapping['total_market_cap'] = col
-                        elif '换手率' in col_str:
-                            column_mapping['turnover_rate'] = col
-                        elif '领涨股票-涨跌幅' in col_str:
-                            column_mapping['leader_change_pct'] = col
-                    
-                    # 创建标准化的DataFrame
-                    processed_data = pd.DataFrame()
-                    
-                    # 复制必要字段
-                    for new_col, old_col in column_mapping.items():
-                        if old_col in sector_df.columns:
-                            processed_data[new_col] = sector_df[old_col]
+                    # 标准化列名（确保一致性）：按别名表精确查找，列顺序保持与原表一致
+                    column_mapping = _map_sector_columns(sector_df.columns)
+                    processed_data = sector_df[list(column_mapping)].rename(columns=column_mapping)
                     
                     # 确保有板块名称和代码
                     if 'sector_name' not in processed_data.columns and len(sector_df.columns) > 1:
@@ -110,12 +258,10 @@ class OptimizedDynamicSectorAnalyzer:
                         processed_data['sector_code'] = processed_data['sector_name']
                     
                     # 数据清洗和类型转换
-                    numeric_columns = ['price', 'change_pct', 'up_count', 'down_count', 
-                                      'total_market_cap', 'turnover_rate', 'leader_change_pct']
-                    
-                    for col in numeric_columns:
-                        if col in processed_data.columns:
-                            processed_data[col] = pd.to_numeric(processed_data[col], errors='coerce')
+                    numeric_columns = [col for col in SECTOR_NUMERIC_COLUMNS if col in processed_data.columns]
+                    if numeric_columns:
+                        # 一次性对整块数值列做转换，无法解析的值（如 '-'）记为 NaN
+                        processed_data[numeric_columns] = processed_data[numeric_columns].apply(pd.to_numeric, errors='coerce')
                     
                     # 计算额外指标
                     if 'up_count' in processed_data.columns and 'down_count' in processed_data.columns:
@@ -123,13 +269,15 @@ class OptimizedDynamicSectorAnalyzer:
                         processed_data['up_ratio'] = (processed_data['up_count'] / processed_data['total_count'] * 100).round(1)
                     
                     # 风险评估
-                    processed_data['risk_level'] = processed_data['sector_name'].apply(self._assess_risk_level)
+                    processed_data['risk_level'] = self._assess_risk_level(processed_data['sector_name'])
                     
                     # 板块类型分类
-                    processed_data['sector_category'] = processed_data['sector_name'].apply(self._categorize_sector)
+                    processed_data['sector_category'] = self._categorize_sector(processed_data['sector_name'])
                     
                     logger.info(f"成功处理 {len(processed_data)} 个板块的实时数据")
-                    return processed_data
+                    self.sector_cache['real_time'] = (time.monotonic(), processed_data)
+                    self._save_sector_cache_file(processed_data)
+                    return processed_data.copy()
                 else:
                     logger.warning(f"板块数据返回空（第{attempt+1}次尝试）")
             except Exception as e:
@@ -147,65 +295,40 @@ class OptimizedDynamicSectorAnalyzer:
         logger.error("无法获取板块实时数据（所有重试均失败）")
         return pd.DataFrame()
     
-    def _assess_risk_level(self, sector_name: str) -> str:
-        """评估板块风险等级"""
-        sector_name_lower = str(sector_name).lower()
-        
-        # 低风险板块
-        low_risk_keywords = ['银行', '煤炭', '电力', '公用事业', '食品', '饮料', '保险', '证券']
-        for keyword in low_risk_keywords:
-            if keyword in sector_name_lower:
-                return 'low'
-        
-        # 高风险板块
-        high_risk_keywords = ['半导体', '软件', '互联网', '科技', '芯片', '人工智能', 'AI', '生物', '游戏', '传媒']
-        for keyword in high_risk_keywords:
-            if keyword in sector_name_lower:
-                return 'high'
-        
-        # 中等风险板块
-        medium_risk_keywords = ['医药', '医疗', '化工', '机械', '汽车', '有色', '金属', '制造', '材料']
-        for keyword in medium_risk_keywords:
-            if keyword in sector_name_lower:
-                return 'medium'
-        
-        return 'medium'  # 默认中等风险
+    def _load_sector_cache_file(self) -> Optional[pd.DataFrame]:
+        """读取未过期的板块数据 Parquet 缓存（未安装 pyarrow、文件不存在或已过期时返回 None）"""
+        if pyarrow is None:
+            return None
+        try:
+            if time.time() - SECTOR_CACHE_FILE.stat().st_mtime >= self.config.get('cache_ttl', 60):
+                return None
+            return pd.read_parquet(SECTOR_CACHE_FILE, engine='pyarrow')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"读取板块数据缓存失败: {e}")
+            return None
+    
+    def _save_sector_cache_file(self, sector_data: pd.DataFrame):
+        """写出板块数据 Parquet 缓存（先写临时文件再 os.replace，其他进程不会读到半截文件）"""
+        if pyarrow is None:
+            return
+        tmp_path = SECTOR_CACHE_FILE.with_name(f"{SECTOR_CACHE_FILE.name}.{os.getpid()}.tmp")
+        try:
+            SECTOR_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            sector_data.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+            os.replace(tmp_path, SECTOR_CACHE_FILE)
+        except Exception as e:
+            logger.warning(f"保存板块数据缓存失败: {e}")
+            tmp_path.unlink(missing_ok=True)
     
-    def _categorize_sector(self, sector_name: str) -> str:
-        """分类板块"""
-        sector_name_lower = str(sector_name).lower()
-        
-        # 科技成长类
-        tech_keywords = ['半导体', '软件', '计算机', '互联网', '科技', '芯片', '人工智能', 'AI', '游戏', '通信']
-        for keyword in tech_keywords:
-            if keyword in sector_name_lower:
-                return 'technology'
-        
-        # 消费类
-        consumer_keywords = ['食品', '饮料', '酿酒', '家电', '汽车', '旅游', '酒店', '商贸', '零售']
-        for keyword in consumer_keywords:
-            if keyword in sector_name_lower:
-                return 'consumer'
-        
-        # 周期类
-        cyclical_keywords = ['有色', '金属', '煤炭', '化工', '石油', '钢铁', '建材', '水泥', '玻璃']
-        for keyword in cyclical_keywords:
-            if keyword in sector_name_lower:
-                return 'cyclical'
-        
-        # 金融地产类
-        finance_keywords = ['银行', '保险', '证券', '房地产', '多元金融']
-        for keyword in finance_keywords:
-            if keyword in sector_name_lower:
-                return 'finance'
-        
-        # 医药医疗类
-        medical_keywords = ['医药', '医疗', '生物', '中药', '制药', '器械', '健康']
-        for keyword in medical_keywords:
-            if keyword in sector_name_lower:
-                return 'medical'
-        
-        return 'other'
+    def _assess_risk_level(self, sector_names: pd.Series) -> pd.Categorical:
+        """评估板块风险等级（整列批量处理）"""
+        return _classify_names(sector_names, _RISK_PATTERNS, 'medium', RISK_LEVEL_DTYPE)  # 默认中等风险
+    
+    def _categorize_sector(self, sector_names: pd.Series) -> pd.Categorical:
+        """分类板块（整列批量处理）"""
+        return _classify_names(sector_names, _CATEGORY_PATTERNS, 'other', SECTOR_CATEGORY_DTYPE)
     
     def calculate_sector_scores(self, sector_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -214,73 +337,40 @@ class OptimizedDynamicSectorAnalyzer:
         if sector_data.empty:
             return pd.DataFrame()
         
-        df = sector_data.copy()
-        
-        # 1. 动量得分（基于涨跌幅）
-        if 'change_pct' in df.columns:
-            # 归一化涨跌幅到0-100分
-            change_pct = df['change_pct'].fillna(0)
-            momentum_score = 50 + change_pct * 10  # 每1%涨跌对应10分变化
-            df['momentum_score'] = np.clip(momentum_score, 0, 100)
-        else:
-            df['momentum_score'] = 50
-        
-        # 2. 广度得分（基于上涨家数比例）
-        if 'up_ratio' in df.columns:
-            up_ratio = df['up_ratio'].fillna(50)
-            breadth_score = up_ratio  # 直接使用上涨比例作为得分（0-100）
-            df['breadth_score'] = np.clip(breadth_score, 0, 100)
-        else:
-            df['breadth_score'] = 50
-        
-        # 3. 关注度得分（基于换手率）
-        if 'turnover_rate' in df.columns:
-            turnover = df['turnover_rate'].fillna(2.0)
-            # 换手率在1-10%之间比较合理
-            attention_score = 50
-            attention_score += (turnover - 2.0) * 10  # 2%为基准，每±1%对应10分
-            df['attention_score'] = np.clip(attention_score, 0, 100)
-        else:
-            df['attention_score'] = 50
+        # 只读取 sector_data，新列最后一次性 assign，不复制整表
+        df = sector_data
         
-        # 4. 稳定性得分（基于市值和领涨股）
-        stability_score = 50
+        # 动量/广度/关注度的输入列缺失值（或缺列）按默认值填充，对应 50 分
+        linear = np.empty((len(df), len(LINEAR_SCORE_COLUMNS)))
+        for j, col in enumerate(LINEAR_SCORE_COLUMNS):
+            fill = _LINEAR_SCORE_FILL[j]
+            linear[:, j] = df[col].to_numpy(dtype=float, na_value=fill) if col in df.columns else fill
         
+        # 稳定性得分的输入列，缺列时传空数组
         if 'total_market_cap' in df.columns:
-            # 市值越大越稳定
-            market_cap = df['total_market_cap'].fillna(1000)
-            market_cap_score = (np.log10(market_cap) - 2) * 10  # 100亿市值得50分
-            stability_score += market_cap_score.clip(-20, 20)
-        
+            market_cap = df['total_market_cap'].to_numpy(dtype=float, na_value=1000)
+        else:
+            market_cap = np.empty(0)
         if 'leader_change_pct' in df.columns:
-            # 领涨股涨幅适中得分高，过大或过小得分低
-            leader_change = df['leader_change_pct'].fillna(0).abs()
-            leader_score = 50
-            leader_score -= (leader_change - 5) * 2  # 5%涨幅最理想
-            stability_score += (leader_score - 50) * 0.5
-        
-        df['stability_score'] = np.clip(stability_score, 0, 100)
-        
-        # 5. 计算综合得分
-        weights = self.config['score_weights']
-        df['total_score'] = (
-            df['momentum_score'] * weights['momentum'] +
-            df['breadth_score'] * weights['breadth'] +
-            df['attention_score'] * weights['attention'] +
-            df['stability_score'] * weights['stability']
+            leader_change = df['leader_change_pct'].to_numpy(dtype=float, na_value=0)
+        else:
+            leader_change = np.empty(0)
+        
+        # 根据风险等级调整（Categorical 列 map 后仍是 Categorical，转为 float 再填充）
+        risk_adjustment = df['risk_level'].map(RISK_ADJUSTMENT).astype(float).fillna(1.0)
+        
+        scores, total_score = sector_score_batch(linear, market_cap, leader_change, self._score_weights,
+                                                 risk_adjustment.to_numpy(dtype=float))
+        total_score = np.round(total_score, 1)
+        
+        return sector_data.assign(
+            momentum_score=scores[:, 0],
+            breadth_score=scores[:, 1],
+            attention_score=scores[:, 2],
+            stability_score=scores[:, 3],
+            total_score=total_score,
+            risk_adjustment=risk_adjustment,
         )
-        
-        # 根据风险等级调整
-        risk_adjustment = {
-            'low': 1.05,   # 低风险加分
-            'medium': 1.00,
-            'high': 0.95    # 高风险减分
-        }
-        df['risk_adjustment'] = df['risk_level'].map(risk_adjustment).fillna(1.0)
-        df['total_score'] = df['total_score'] * df['risk_adjustment']
-        df['total_score'] = df['total_score'].round(1)
-        
-        return df
     
     def filter_and_rank_sectors(self, sector_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -289,18 +379,20 @@ class OptimizedDynamicSectorAnalyzer:
         if sector_data.empty:
             return pd.DataFrame()
         
-        df = sector_data.copy()
+        # 先合并各过滤条件，最后只做一次行筛选（筛选本身生成新表，无需先复制）
+        df = sector_data
+        keep = np.ones(len(df), dtype=bool)
         
         # 1. 排除不需要的板块
-        exclude_keywords = self.config['exclude_keywords']
-        exclusion_mask = df['sector_name'].apply(
-            lambda x: not any(keyword in str(x) for keyword in exclude_keywords)
-        )
-        df = df[exclusion_mask]
+        if self._exclude_pattern is not None:
+            excluded = df['sector_name'].astype(str).str.contains(self._exclude_pattern, na=False)
+            keep &= ~excluded.to_numpy(dtype=bool)
         
         # 2. 过滤掉股票数量太少的板块（如果数据中有）
         if 'total_count' in df.columns:
-            df = df[df['total_count'] >= self.config['min_stock_count']]
+            keep &= (df['total_count'] >= self.config['min_stock_count']).to_numpy(dtype=bool)
+        
+        df = df[keep]
         
         # 3. 计算得分（如果还没计算）
         if 'total_score' not in df.columns:
@@ -344,22 +436,26 @@ class OptimizedDynamicSectorAnalyzer:
             top_sectors = ranked_sectors.head(3)
             logger.warning(f"没有板块达到最低得分{min_score}，返回前3个")
         
+        # 强度等级整列分档：side='right' 与逐个 >= 判断一致；NaN 会被排到末档，需显式归入最弱一档
+        scores = top_sectors['total_score'].to_numpy(dtype=float, na_value=np.nan)
+        levels = np.searchsorted(STRENGTH_BINS, scores, side='right')
+        levels[np.isnan(scores)] = 0
+        
+        reasons = self._generate_recommendation_reasons(top_sectors)
+        
         recommendations = []
-        for _, row in top_sectors.iterrows():
-            score = row['total_score']
-            strength, recommendation = self._get_strength_recommendation(score)
-            
+        for row, level, reason in zip(top_sectors.to_dict(orient='records'), levels, reasons):
             rec = {
                 'sector_name': row['sector_name'],
                 'sector_code': row.get('sector_code', row['sector_name']),
-                'score': score,
-                'strength': strength,
-                'recommendation': recommendation,
+                'score': row['total_score'],
+                'strength': STRENGTH_LABELS[level],
+                'recommendation': RECOMMENDATION_LABELS[level],
                 'risk_level': row['risk_level'],
                 'sector_category': row.get('sector_category', 'unknown'),
                 'change_pct': row.get('change_pct', 0),
                 'up_ratio': row.get('up_ratio', 50),
-                'reason': self._generate_recommendation_reason(row)
+                'reason': reason
             }
             
             # 添加额外信息
@@ -373,46 +469,30 @@ class OptimizedDynamicSectorAnalyzer:
         logger.info(f"推荐 {len(recommendations)} 个最强板块")
         return recommendations
     
-    def _get_strength_recommendation(self, score: float) -> Tuple[str, str]:
-        """根据得分获取强度等级和推荐建议"""
-        if score >= 75:
-            return "强势", "重点关注"
-        elif score >= 65:
-            return "偏强", "积极关注"
-        elif score >= 55:
-            return "中性", "适度关注"
-        elif score >= 45:
-            return "偏弱", "谨慎关注"
-        else:
-            return "弱势", "观望"
-    
-    def _generate_recommendation_reason(self, row: pd.Series) -> str:
-        """生成推荐理由"""
-        reasons = []
-        
-        if 'change_pct' in row and not pd.isna(row['change_pct']):
-            change = row['change_pct']
-            if change > 0:
-                reasons.append(f"板块上涨{change:.2f}%")
-            else:
-                reasons.append(f"板块下跌{abs(change):.2f}%")
-        
-        if 'up_ratio' in row and not pd.isna(row['up_ratio']):
-            up_ratio = row['up_ratio']
-            if up_ratio > 60:
-                reasons.append(f"{up_ratio:.1f}%股票上涨")
-            elif up_ratio < 40:
-                reasons.append(f"{up_ratio:.1f}%股票上涨（偏弱）")
-        
-        if 'turnover_rate' in row and not pd.isna(row['turnover_rate']):
-            turnover = row['turnover_rate']
-            if turnover > 3:
-                reasons.append(f"换手率{turnover:.1f}%（活跃）")
-        
-        if not reasons:
-            reasons.append("综合评分较高")
-        
-        return "，".join(reasons)
+    def _generate_recommendation_reasons(self, sectors: pd.DataFrame) -> List[str]:
+        """
+        批量生成推荐理由：每类理由整列格式化为字符串数组（不满足条件或缺失值为空串），
+        最后逐行把非空片段用“，”连接，都为空时为“综合评分较高”
+        """
+        fragments = []
+        
+        if 'change_pct' in sectors.columns:
+            change = sectors['change_pct'].to_numpy(dtype=float, na_value=np.nan)
+            text = np.char.add(np.where(change > 0, '板块上涨', '板块下跌'), np.char.mod('%.2f%%', np.abs(change)))
+            fragments.append(np.where(np.isnan(change), '', text))
+        
+        if 'up_ratio' in sectors.columns:
+            up_ratio = sectors['up_ratio'].to_numpy(dtype=float, na_value=np.nan)
+            text = np.char.mod('%.1f%%股票上涨', up_ratio)
+            fragments.append(np.where(up_ratio > 60, text,
+                                      np.where(up_ratio < 40, np.char.add(text, '（偏弱）'), '')))
+        
+        if 'turnover_rate' in sectors.columns:
+            turnover = sectors['turnover_rate'].to_numpy(dtype=float, na_value=np.nan)
+            fragments.append(np.where(turnover > 3, np.char.mod('换手率%.1f%%（活跃）', turnover), ''))
+        
+        return ["，".join(part for part in parts if part) or "综合评分较高"
+                for parts in zip(*fragments, [''] * len(sectors))]
     
     def generate_sector_report(self, sector_data: pd.DataFrame = None, 
                               top_sectors: List[Dict] = None) -> str:
@@ -440,23 +520,32 @@ class OptimizedDynamicSectorAnalyzer:
         
         # 市场整体概况
         if 'change_pct' in ranked_sectors.columns:
-            avg_change = ranked_sectors['change_pct'].mean()
-            up_sector_ratio = (ranked_sectors['change_pct'] > 0).sum() / len(ranked_sectors) * 100
+            # 均值、上涨比例、涨幅前三都取自同一个数组（均值跳过缺失值，与 Series.mean 一致）
+            change = ranked_sectors['change_pct'].to_numpy(dtype=float, na_value=np.nan)
+            avg_change = np.nanmean(change)
+            # 过滤后可能没有板块：此时比例为 nan，而不是除零报错
+            up_sector_ratio = np.count_nonzero(change > 0) / len(change) * 100 if len(change) else np.nan
             report_lines.append("📈 市场整体概况:")
             report_lines.append(f"  板块平均涨跌幅: {avg_change:.2f}%")
             report_lines.append(f"  上涨板块比例: {up_sector_ratio:.1f}%")
             
-            # 涨幅前三
-            top_gainers = ranked_sectors.nlargest(3, 'change_pct')[['sector_name', 'change_pct']]
+            # 涨幅前三（稳定排序：同涨幅按原顺序，与 nlargest(3) 一致；缺失值排在最后，不列出）
+            names = ranked_sectors['sector_name'].to_numpy()
+            top_idx = np.argsort(-change, kind='stable')[:3]
+            top_idx = top_idx[~np.isnan(change[top_idx])]
             report_lines.append(f"  涨幅前三板块:")
-            for _, row in top_gainers.iterrows():
-                report_lines.append(f"    • {row['sector_name']}: {row['change_pct']:.2f}%")
+            for i in top_idx:
+                report_lines.append(f"    • {names[i]}: {change[i]:.2f}%")
         
         # 板块类别分布
         if 'sector_category' in ranked_sectors.columns:
-            category_counts = ranked_sectors['sector_category'].value_counts()
+            # factorize 按首次出现顺序编码（缺失值为 -1 不计数），bincount 计数后按数量稳定降序，
+            # 只列出出现过的类别，与 value_counts() 的顺序一致
+            codes, categories = pd.factorize(ranked_sectors['sector_category'])
+            counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+            order = np.argsort(-counts, kind='stable')
             report_lines.append(f"\n🏷️  板块类别分布:")
-            for category, count in category_counts.items():
+            for category, count in zip(categories[order], counts[order]):
                 percentage = count / len(ranked_sectors) * 100
                 report_lines.append(f"  {category}: {count}个 ({percentage:.1f}%)")
         
@@ -6,26 +6,119 @@ import yaml
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import logging
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from src.utils.config_loader import load_yaml
+from src.utils.jit import NUMBA_AVAILABLE, jit
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+SECTOR_FETCH_WORKERS = 8  # 并发获取板块成分股的最大线程数
+SECTOR_STOCKS_CACHE_TTL = 60  # 板块成分股缓存有效期（秒）
+
+
+def _change_stats_numpy(changes):
+    """change_stats_batch 的 NumPy 实现（未安装 numba 时使用）"""
+    valid = changes[~np.isnan(changes)]
+    up = valid[valid > 0]
+    top_sum = np.partition(valid, valid.size - 5)[-5:].sum() if valid.size >= 5 else 0.0
+    return valid.size, up.size, np.nansum(changes), up.sum(), top_sum
+
+
+def _change_stats_loop(changes):
+    """change_stats_batch 的单次遍历实现（由 numba 编译）"""
+    top = np.full(5, -np.inf)  # 降序维护的前5涨幅
+    valid_count = 0
+    up_count = 0
+    change_sum = 0.0
+    up_sum = 0.0
+    for i in range(changes.shape[0]):
+        change = changes[i]
+        if np.isnan(change):
+            continue
+        valid_count += 1
+        change_sum += change
+        if change > 0:
+            up_count += 1
+            up_sum += change
+        if change > top[4]:
+            j = 4
+            while j > 0 and top[j - 1] < change:
+                top[j] = top[j - 1]
+                j -= 1
+            top[j] = change
+    top_sum = top.sum() if valid_count >= 5 else 0.0
+    return valid_count, up_count, change_sum, up_sum, top_sum
+
+
+# 板块涨跌幅统计：返回 (有效数, 上涨家数, 有效涨跌幅之和, 上涨股涨幅之和, 前5涨幅之和)。
+# 安装了 numba 时编译单次遍历的循环（带磁盘缓存），否则用 NumPy 整列运算；两者只在求和的末位舍入上可能不同
+change_stats_batch = jit(_change_stats_loop) if NUMBA_AVAILABLE else _change_stats_numpy
+
+
+@dataclass
+class SectorMetrics:
+    """板块成分股涨跌幅统计：change_pct 只取一次数组、只做一次缺失值/上涨判断，各项得分共用"""
+    stock_count: int           # 成分股数量（含涨跌幅缺失的）
+    has_change: bool           # 数据中是否有 change_pct 列
+    valid_count: int = 0       # 涨跌幅非缺失的数量
+    up_count: int = 0          # 上涨家数
+    avg_change: float = 0      # 平均涨跌幅（跳过缺失值）
+    avg_up: float = 0          # 上涨股平均涨幅（无上涨股时为 0）
+    avg_top: float = 0         # 涨幅前5平均（不足5只时同 avg_up）
+    
+    @classmethod
+    def from_stocks(cls, stocks: pd.DataFrame) -> 'SectorMetrics':
+        """从板块成分股表计算统计量（无 change_pct 列时只记录成分股数量）"""
+        if 'change_pct' not in stocks.columns:
+            return cls(stock_count=len(stocks), has_change=False)
+        
+        changes = stocks['change_pct'].to_numpy(dtype=float, na_value=np.nan)
+        valid_count, up_count, change_sum, up_sum, top_sum = change_stats_batch(changes)
+        # 均值用 NumPy 标量相除，与原 pandas/NumPy 均值的类型和取整行为一致
+        avg_change = np.float64(change_sum) / valid_count if valid_count else np.nan
+        avg_up = np.float64(up_sum) / up_count if up_count > 0 else 0
+        avg_top = np.float64(top_sum) / 5 if valid_count >= 5 else avg_up
+        return cls(stock_count=len(stocks), has_change=True, valid_count=int(valid_count),
+                   up_count=np.int64(up_count), avg_change=avg_change, avg_up=avg_up, avg_top=avg_top)
+
 class MarketAnalyzer:
     """市场环境分析器"""
     
     def __init__(self, data_fetcher):
         self.data_fetcher = data_fetcher
         self.sectors = []  # 将从配置文件加载
+        self.sectors_df = None  # self.sectors 的列式表（name/code/weight/risk_level）
+        self._stocks_cache = {}  # 板块成分股缓存：{板块代码: (获取时刻, DataFrame)}
+        
+    def clear_cache(self):
+        """清空板块成分股缓存（需要强制重新获取时调用）"""
+        self._stocks_cache.clear()
+    
+    def _get_sector_stocks(self, sector_code: str) -> pd.DataFrame:
+        """
+        获取板块成分股（带短期缓存）
+        
+        板块强度分析和板块内选股会反复请求同一板块，有效期内直接复用；空结果不缓存，下次重新获取。
+        """
+        cached = self._stocks_cache.get(sector_code)
+        if cached is not None and time.monotonic() - cached[0] < SECTOR_STOCKS_CACHE_TTL:
+            return cached[1]
+        stocks = self.data_fetcher.get_sector_stocks(sector_code)
+        if not stocks.empty:
+            self._stocks_cache[sector_code] = (time.monotonic(), stocks)
+        return stocks
         
     def load_sectors_from_config(self, config_path: str = None) -> List[Dict]:
         """
         直接从 config/sectors.yaml 文件加载板块配置。
         这是最可靠的方式，前提是配置文件格式正确。
         """
-        import yaml
         import os
         
         if config_path is None:
@@ -35,8 +128,7 @@ class MarketAnalyzer:
             config_path = os.path.join(project_root, 'config', 'sectors.yaml')
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f)
+            config_data = load_yaml(config_path)
             
             # 从配置中提取 focus_sectors 列表
             sectors_list = config_data.get('focus_sectors', [])
@@ -53,24 +145,39 @@ class MarketAnalyzer:
                 }
                 # 可选：验证code是否有效
                 if not formatted_sector['code']:
-                    logger.warning(f"板块 {formatted_sector['name']} 的 code 字段为空，将被跳过。")
+                    logger.warning("板块 %s 的 code 字段为空，将被跳过。", formatted_sector['name'])
                     continue
                 formatted_sectors.append(formatted_sector)
             
-            logger.info(f"从 {config_path} 成功加载 {len(formatted_sectors)} 个板块配置。")
+            logger.info("从 %s 成功加载 %d 个板块配置。", config_path, len(formatted_sectors))
             self.sectors = formatted_sectors
+            self.sectors_df = self._sector_table(formatted_sectors)
             return self.sectors
             
         except FileNotFoundError:
-            logger.error(f"配置文件未找到: {config_path}，请检查路径。")
+            logger.error("配置文件未找到: %s，请检查路径。", config_path)
             return []
         except yaml.YAMLError as e:
-            logger.error(f"YAML配置文件解析失败: {e}")
+            logger.error("YAML配置文件解析失败: %s", e)
             return []
         except Exception as e:
-            logger.error(f"加载配置文件时发生未知错误: {e}")
+            logger.error("加载配置文件时发生未知错误: %s", e)
             return []
     
+    @staticmethod
+    def _sector_table(sector_list: List[Dict]) -> pd.DataFrame:
+        """
+        把板块配置列表转为列式表：name/code 字符串列、weight 浮点列、risk_level 为 Categorical
+        
+        缺少 weight / risk_level 时分别取 0.1 / 'medium'。
+        """
+        return pd.DataFrame({
+            'name': [sector['name'] for sector in sector_list],
+            'code': [sector['code'] for sector in sector_list],
+            'weight': np.array([sector.get('weight', 0.1) for sector in sector_list], dtype=float),
+            'risk_level': pd.Categorical([sector.get('risk_level', 'medium') for sector in sector_list]),
+        })
+    
     def analyze_sector_strength(self, sector_list: List[Dict] = None) -> pd.DataFrame:
         """
         分析板块强度
@@ -79,122 +186,125 @@ class MarketAnalyzer:
         if sector_list is None:
             sector_list = self.sectors if self.sectors else self.load_sectors_from_config()
         
+        # 板块配置转为列式表（分析 self.sectors 时直接复用加载时建好的表）
+        if sector_list is self.sectors and self.sectors_df is not None:
+            sectors = self.sectors_df
+        else:
+            sectors = self._sector_table(sector_list)
+        
+        # 获取成分股是网络 I/O，各板块并发统计分项得分；map 按输入顺序返回结果
         results = []
+        if len(sectors):
+            with ThreadPoolExecutor(max_workers=min(SECTOR_FETCH_WORKERS, len(sectors))) as executor:
+                results = list(executor.map(self._analyze_one_sector, sectors['name'], sectors['code']))
+        kept = [i for i, r in enumerate(results) if r is not None]
         
-        for sector in sector_list:
-            sector_name = sector['name']
-            sector_code = sector['code']
-            
-            try:
-                logger.info(f"分析板块: {sector_name}")
-                
-                # 1. 获取板块成分股
-                stocks = self.data_fetcher.get_sector_stocks(sector_code)
-                if len(stocks) < 5:  # 成分股太少
-                    logger.warning(f"板块 {sector_name} 成分股太少: {len(stocks)}")
-                    continue
-                
-                # 2. 计算板块平均表现
-                if 'change_pct' in stocks.columns:
-                    avg_change = stocks['change_pct'].mean()
-                    up_ratio = (stocks['change_pct'] > 0).sum() / len(stocks)
-                else:
-                    avg_change = 0
-                    up_ratio = 0
-                
-                # 3. 计算板块动量得分
-                momentum_score = self._calculate_momentum_score(stocks)
-                
-                # 4. 计算资金关注度
-                volume_score = self._calculate_volume_score(stocks)
-                
-                # 5. 计算龙头股表现
-                leader_score = self._calculate_leader_score(stocks)
-                
-                # 综合得分
-                total_score = (
-                    momentum_score * 0.4 +
-                    volume_score * 0.3 +
-                    leader_score * 0.2 +
-                    min(avg_change * 5, 100) * 0.1  # 归一化涨跌幅
-                )
-                
-                # 确定趋势方向
-                trend = self._determine_trend(avg_change, up_ratio, momentum_score)
-                
-                results.append({
-                    'sector_name': sector_name,
-                    'sector_code': sector_code,
-                    'stock_count': len(stocks),
-                    'avg_change': round(avg_change, 2),
-                    'up_ratio': round(up_ratio * 100, 1),
-                    'momentum_score': round(momentum_score, 1),
-                    'volume_score': round(volume_score, 1),
-                    'leader_score': round(leader_score, 1),
-                    'total_score': round(total_score, 1),
-                    'trend': trend,
-                    'weight': sector.get('weight', 0.1),
-                    'risk_level': sector.get('risk_level', 'medium')
-                })
-                
-                logger.info(f"板块 {sector_name} 分析完成: 得分 {total_score:.1f}, 趋势 {trend}")
-                
-            except Exception as e:
-                logger.error(f"分析板块 {sector_name} 失败: {e}")
-                continue
-        
-        # 转换为DataFrame并排序
-        if results:
-            df = pd.DataFrame(results)
-            df = df.sort_values('total_score', ascending=False)
-            df.reset_index(drop=True, inplace=True)
-            return df
-        else:
+        if not kept:
             logger.warning("没有板块分析结果")
             return pd.DataFrame()
+        
+        # 各板块的统计量一次转为 (板块数, 6) 浮点矩阵，综合得分、趋势和取整整列计算
+        stats = np.array([results[i] for i in kept], dtype=float)
+        stock_count, avg_change, up_ratio, momentum_score, volume_score, leader_score = stats.T
+        total_score = (
+            momentum_score * 0.4 +
+            volume_score * 0.3 +
+            leader_score * 0.2 +
+            np.minimum(avg_change * 5, 100) * 0.1  # 归一化涨跌幅
+        )
+        
+        # 确定趋势方向
+        trend = self._determine_trend(avg_change, up_ratio, momentum_score)
+        
+        sector_names = sectors['name'].to_numpy()[kept]
+        if logger.isEnabledFor(logging.INFO):
+            for sector_name, score, sector_trend in zip(sector_names, total_score, trend):
+                logger.info("板块 %s 分析完成: 得分 %.1f, 趋势 %s", sector_name, score, sector_trend)
+        
+        # 按列直接构建结果表；权重和风险等级按行号从配置表整列取出
+        df = pd.DataFrame({
+            'sector_name': sector_names,
+            'sector_code': sectors['code'].to_numpy()[kept],
+            'stock_count': stock_count.astype(np.int64),
+            'avg_change': np.round(avg_change, 2),
+            'up_ratio': np.round(up_ratio * 100, 1),
+            'momentum_score': np.round(momentum_score, 1),
+            'volume_score': np.round(volume_score, 1),
+            'leader_score': np.round(leader_score, 1),
+            'total_score': np.round(total_score, 1),
+            'trend': trend,
+            'weight': sectors['weight'].to_numpy()[kept],
+            'risk_level': sectors['risk_level'].to_numpy(dtype=object)[kept],
+        })
+        
+        # 按综合得分降序（稳定排序：同分按输入顺序，缺失值排最后）
+        order = np.argsort(-df['total_score'].to_numpy(), kind='stable')
+        return df.iloc[order].reset_index(drop=True)
+    
+    def _analyze_one_sector(self, sector_name: str, sector_code: str) -> Optional[Tuple]:
+        """
+        统计单个板块的涨跌表现和各分项得分（在线程池中执行，数值未取整）
+        
+        返回 (成分股数, 平均涨跌幅, 上涨比例, 动量得分, 资金关注度得分, 龙头股得分)；
+        成分股太少或分析失败时返回 None。
+        """
+        try:
+            logger.info("分析板块: %s", sector_name)
+            
+            # 1. 获取板块成分股
+            stocks = self._get_sector_stocks(sector_code)
+            if len(stocks) < 5:  # 成分股太少
+                logger.warning("板块 %s 成分股太少: %d", sector_name, len(stocks))
+                return None
+            
+            # 2. 计算板块平均表现（涨跌幅统计只算一次，动量/资金关注度得分共用）
+            metrics = SectorMetrics.from_stocks(stocks)
+            avg_change = metrics.avg_change
+            up_ratio = metrics.up_count / metrics.stock_count if metrics.has_change else 0
+            
+            # 3. 计算板块动量得分
+            momentum_score = self._calculate_momentum_score(metrics)
+            
+            # 4. 计算资金关注度
+            volume_score = self._calculate_volume_score(metrics)
+            
+            # 5. 计算龙头股表现
+            leader_score = self._calculate_leader_score(stocks)
+            
+            return len(stocks), avg_change, up_ratio, momentum_score, volume_score, leader_score
+        
+        except Exception as e:
+            logger.error("分析板块 %s 失败: %s", sector_name, e)
+            return None
     
-    def _calculate_momentum_score(self, stocks_df: pd.DataFrame) -> float:
+    def _calculate_momentum_score(self, metrics: SectorMetrics) -> float:
         """计算动量得分"""
-        if 'change_pct' not in stocks_df.columns:
+        if not metrics.has_change:
             return 50  # 默认中间值
         
-        changes = stocks_df['change_pct'].dropna()
-        if len(changes) < 3:
+        if metrics.valid_count < 3:
             return 50
         
         # 上涨股票比例
-        up_ratio = (changes > 0).sum() / len(changes)
-        
-        # 平均涨幅
-        avg_up = changes[changes > 0].mean() if (changes > 0).any() else 0
+        up_ratio = metrics.up_count / metrics.valid_count
         
-        # 动量强度（基于涨幅分布）
-        if len(changes) >= 5:
-            top_performers = changes.nlargest(min(5, len(changes)))
-            avg_top = top_performers.mean()
-        else:
-            avg_top = avg_up
-        
-        # 动量得分（0-100）
-        momentum_score = min(100, up_ratio * 60 + min(avg_up, 10) * 2 + min(avg_top, 20) * 1)
+        # 动量得分（0-100）：上涨比例 + 平均涨幅 + 动量强度（涨幅前5平均）
+        momentum_score = min(100, up_ratio * 60 + min(metrics.avg_up, 10) * 2 + min(metrics.avg_top, 20) * 1)
         return momentum_score
     
-    def _calculate_volume_score(self, stocks_df: pd.DataFrame) -> float:
+    def _calculate_volume_score(self, metrics: SectorMetrics) -> float:
         """计算成交量得分（简化版）"""
         # 这里简化处理，实际应用中可能需要获取历史成交量数据
-        if 'change_pct' not in stocks_df.columns:
+        if not metrics.has_change:
             return 50
         
         # 假设涨幅大的股票通常成交量也活跃
-        changes = stocks_df['change_pct'].dropna()
-        if len(changes) < 3:
+        if metrics.valid_count < 3:
             return 50
         
         # 基于涨幅的活跃度估计
-        positive_changes = changes[changes > 0]
-        if len(positive_changes) > 0:
-            avg_positive = positive_changes.mean()
-            score = min(100, 50 + avg_positive * 3)
+        if metrics.up_count > 0:
+            score = min(100, 50 + metrics.avg_up * 3)
         else:
             score = 40
         
@@ -206,31 +316,56 @@ class MarketAnalyzer:
             return 50
         
         # 选择市值或价格较高的作为龙头（简化处理）
-        if 'price' in stocks_df.columns:
-            # 按价格排序，价格高的可能是龙头
-            sorted_stocks = stocks_df.sort_values('price', ascending=False)
-            top_stocks = sorted_stocks.head(min(3, len(sorted_stocks)))
-            
-            if 'change_pct' in top_stocks.columns:
-                avg_leader_change = top_stocks['change_pct'].mean()
-                # 龙头股得分：50分基础，根据表现加减
-                score = 50 + avg_leader_change * 2
-                return max(0, min(100, score))
+        if 'price' in stocks_df.columns and 'change_pct' in stocks_df.columns:
+            # 价格最高的3只视为龙头（argpartition 部分选择，不对整表排序）
+            prices = stocks_df['price'].to_numpy(dtype=float, na_value=np.nan)
+            changes = stocks_df['change_pct'].to_numpy(dtype=float, na_value=np.nan)
+            leaders = self._top_k_indices(prices, 3)
+            leader_changes = changes[leaders]
+            valid = ~np.isnan(leader_changes)
+            # 与 Series.mean 相同：缺失值按 0 参与求和，再除以有效个数
+            avg_leader_change = (np.where(valid, leader_changes, 0.0).sum() / valid.sum()
+                                 if valid.any() else np.nan)
+            # 龙头股得分：50分基础，根据表现加减
+            score = 50 + avg_leader_change * 2
+            return max(0, min(100, score))
         
         return 50
     
-    def _determine_trend(self, avg_change: float, up_ratio: float, momentum_score: float) -> str:
-        """确定趋势方向"""
-        if momentum_score >= 70 and up_ratio >= 60:
-            return "强势上涨"
-        elif momentum_score >= 60 and up_ratio >= 50:
-            return "温和上涨"
-        elif momentum_score >= 40 and up_ratio >= 40:
-            return "震荡整理"
-        elif momentum_score >= 30:
-            return "弱势整理"
-        else:
-            return "趋势向下"
+    @staticmethod
+    def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+        """
+        取值从高到低前 k 个的行号（argpartition 部分选择），与 sort_values(ascending=False).head(k) 一致：
+        同值按原顺序，缺失值排在最后
+        """
+        valid_idx = np.flatnonzero(~np.isnan(values))
+        n = len(valid_idx)
+        if k <= 0:
+            return valid_idx[:0]
+        if n > k:
+            valid_values = values[valid_idx]
+            kth = np.partition(valid_values, n - k)[n - k]  # 第 k 大的值
+            above = valid_idx[valid_values > kth]
+            ties = valid_idx[valid_values == kth][:k - len(above)]
+            valid_idx = np.concatenate([above, ties])
+        valid_idx = valid_idx[np.argsort(-values[valid_idx], kind='stable')]
+        if len(valid_idx) >= k:
+            return valid_idx
+        return np.concatenate([valid_idx, np.flatnonzero(np.isnan(values))[:k - len(valid_idx)]])
+    
+    def _determine_trend(self, avg_change: np.ndarray, up_ratio: np.ndarray,
+                         momentum_score: np.ndarray) -> List[str]:
+        """确定趋势方向（对所有板块一次性计算，按顺序取第一个满足的条件）"""
+        ms = np.asarray(momentum_score, dtype=float)
+        ur = np.asarray(up_ratio, dtype=float)
+        conds = [
+            (ms >= 70) & (ur >= 60),
+            (ms >= 60) & (ur >= 50),
+            (ms >= 40) & (ur >= 40),
+            ms >= 30,
+        ]
+        choices = ["强势上涨", "温和上涨", "震荡整理", "弱势整理"]
+        return np.select(conds, choices, default="趋势向下").tolist()
     
     def get_recommended_sectors(self, sector_strength_df: pd.DataFrame, 
                            max_sectors: int = 3) -> List[Dict]:
@@ -240,39 +375,42 @@ class MarketAnalyzer:
         if sector_strength_df.empty:
             return []
         
-        # 按综合得分排序
-        sector_strength_df = sector_strength_df.sort_values('total_score', ascending=False)
+        # 按综合得分排序（analyze_sector_strength 的结果已降序，无需再排）
+        scores = sector_strength_df['total_score']
+        if not scores.is_monotonic_decreasing:
+            order = np.argsort(-scores.to_numpy(dtype=float, na_value=np.nan), kind='stable')
+            sector_strength_df = sector_strength_df.iloc[order]
         
         # 选择前N个板块
         selected = sector_strength_df.head(max_sectors)
         
-        recommendations = []
-        for _, row in selected.iterrows():
-            # 根据得分确定推荐强度
-            score = row['total_score']
-            if score >= 70:
-                strength = "强势"
-                recommendation = "重点关注"
-            elif score >= 50:
-                strength = "中性"
-                recommendation = "适度关注"
-            else:
-                strength = "弱势"
-                recommendation = "谨慎关注"
-            
-            recommendations.append({
-                'sector_name': row['sector_name'],
-                'sector_code': row['sector_code'],
-                'score': score,
-                'strength': strength,  # 添加这个字段
-                'trend': row.get('trend_status', '未知'),
-                'recommendation': recommendation,
-                'weight': row.get('weight', 0.1),
-                'risk_level': row.get('risk_level', 'medium'),
-                'reason': f"综合得分{score:.1f}，趋势{row.get('trend_status', '未知')}"
-            })
-        
-        return recommendations
+        # 根据得分确定推荐强度（整列 np.select，不再逐行 iterrows）
+        scores = selected['total_score'].to_numpy(dtype=float, na_value=np.nan)
+        conds = [scores >= 70, scores >= 50]
+        strength = np.select(conds, ['强势', '中性'], default='弱势')
+        recommendation = np.select(conds, ['重点关注', '适度关注'], default='谨慎关注')
+        
+        def column_or(name: str, default: Any) -> List:
+            if name in selected.columns:
+                return selected[name].tolist()
+            return [default] * len(selected)
+        
+        score_list = selected['total_score'].tolist()
+        trend = column_or('trend_status', '未知')
+        reason = [f"综合得分{score:.1f}，趋势{t}" for score, t in zip(score_list, trend)]
+        
+        columns = {
+            'sector_name': selected['sector_name'].tolist(),
+            'sector_code': selected['sector_code'].tolist(),
+            'score': score_list,
+            'strength': strength.tolist(),
+            'trend': trend,
+            'recommendation': recommendation.tolist(),
+            'weight': column_or('weight', 0.1),
+            'risk_level': column_or('risk_level', 'medium'),
+            'reason': reason,
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
     
     def _generate_recommendation(self, score: float, trend: str) -> str:
         """生成推荐建议"""
@@ -293,21 +431,19 @@ class MarketAnalyzer:
         """
         try:
             # 获取板块成分股
-            stocks = self.data_fetcher.get_sector_stocks(sector_code)
+            stocks = self._get_sector_stocks(sector_code)
             if stocks.empty:
                 return pd.DataFrame()
             
-            # 按涨跌幅排序
+            # 按涨跌幅取前 top_n（部分选择，不对整表排序）
             if 'change_pct' in stocks.columns:
-                sorted_stocks = stocks.sort_values('change_pct', ascending=False)
-                top_stocks = sorted_stocks.head(top_n)
+                changes = stocks['change_pct'].to_numpy(dtype=float, na_value=np.nan)
+                # 与 head(top_n) 一致：负数表示去掉末尾 |top_n| 行
+                k = top_n if top_n >= 0 else max(len(stocks) + top_n, 0)
+                top_idx = self._top_k_indices(changes, k)
                 
-                # 添加分析指标
-                result = pd.DataFrame()
-                result['symbol'] = top_stocks['symbol']
-                result['name'] = top_stocks['name']
-                result['price'] = top_stocks['price']
-                result['change_pct'] = top_stocks['change_pct']
+                # 一次选出所需列（保留原行索引），再添加分析指标
+                result = stocks.iloc[top_idx][['symbol', 'name', 'price', 'change_pct']].copy()
                 
                 # 计算相对强度
                 if len(stocks) > 1:
@@ -320,7 +456,7 @@ class MarketAnalyzer:
                 return pd.DataFrame()
                 
         except Exception as e:
-            logger.error(f"分析板块 {sector_code} 内股票失败: {e}")
+            logger.error("分析板块 %s 内股票失败: %s", sector_code, e)
             return pd.DataFrame()
 
 def test_market_analyzer():
@@ -55,3 +55,25 @@ class CacheManager:
             logger.debug(f"保存到缓存: {key}")
         except Exception as e:
             logger.warning(f"保存缓存失败 {key}: {e}")
+    
+    def prune(self, prefix: str, max_age_hours: float) -> int:
+        """删除键以 prefix 开头、且超过 max_age_hours 未更新的缓存文件，返回删除的文件数"""
+        safe_prefix = prefix.replace('/', '_').replace('\\', '_')
+        cutoff = datetime.now().timestamp() - max_age_hours * 3600
+        removed = 0
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if not (entry.name.startswith(safe_prefix) and entry.name.endswith('.pkl')):
+                        continue
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                            removed += 1
+                    except OSError as e:
+                        logger.warning(f"删除过期缓存失败 {entry.name}: {e}")
+        except OSError as e:
+            logger.warning(f"清理缓存目录失败 {self.cache_dir}: {e}")
+        if removed:
+            logger.debug(f"清理过期缓存 {prefix}*: {removed} 个文件")
+        return removed
@@ -0,0 +1,109 @@
+"""
+CSV 写出工具 - 优先使用 pyarrow 的 C++ 写出器
+
+与 pandas.to_csv 相比，pyarrow 写出的文本有两处不同（读回 pandas/Excel 后的值相同）：
+- 所有字符串值和表头都带双引号
+- 整数值的浮点数不带 .0（如 10.0 写作 10）
+布尔值（True/False）和时间戳（整日只写日期、按需保留秒以下位数）写出前转换为与 pandas 相同的形式。
+"""
+import os
+import pandas as pd
+import logging
+from typing import List, Optional, Union
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pacompute  # type: ignore
+    import pyarrow.csv as pacsv  # type: ignore
+except Exception:
+    pa = None  # Optional dependency
+    pacompute = None
+    pacsv = None
+
+logger = logging.getLogger(__name__)
+
+UTF8_BOM = b'\xef\xbb\xbf'
+_NESTED_TYPES = (list, tuple, dict)
+
+
+def _stringify_nested(df: pd.DataFrame) -> pd.DataFrame:
+    """Arrow 的 CSV 写出器不支持嵌套类型，将 list/tuple/dict 单元格转为与 pandas 一致的 str 形式"""
+    nested_cols = [
+        col for col in df.columns
+        if df[col].dtype == object and df[col].map(lambda v: isinstance(v, _NESTED_TYPES)).any()
+    ]
+    if not nested_cols:
+        return df
+    df = df.copy()
+    for col in nested_cols:
+        df[col] = df[col].map(lambda v: str(v) if isinstance(v, _NESTED_TYPES) else v)
+    return df
+
+
+def _pandas_rendering(column):
+    """把 Arrow 与 pandas.to_csv 写法不同的布尔/时间戳列转换为 pandas 的写法，其余列原样返回"""
+    col_type = column.type
+    if pa.types.is_boolean(col_type):
+        return pacompute.if_else(column, 'True', 'False')
+    if pa.types.is_timestamp(col_type) and col_type.tz is None:
+        # pandas：全部为零点时只写日期；否则只保留实际用到的秒以下位数
+        dates = column.cast(pa.date32())
+        if pacompute.all(pacompute.equal(dates.cast(col_type), column)).as_py() is not False:
+            return dates
+        for unit in ('s', 'ms', 'us'):
+            try:
+                return column.cast(pa.timestamp(unit))  # 安全转换，会丢精度时抛 ArrowInvalid
+            except pa.ArrowInvalid:
+                continue
+    return column
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """
+    将 DataFrame 转换为 Arrow 表，供多次写出复用（如完整版和 select 出的简化版）
+
+    未安装 pyarrow 或无法转换（如混合类型的 object 列）时返回 None。
+    """
+    if pa is None:
+        return None
+    try:
+        table = pa.Table.from_pandas(_stringify_nested(df), preserve_index=False)
+        for i, name in enumerate(table.column_names):
+            column = table.column(i)
+            rendered = _pandas_rendering(column)
+            if rendered is not column:
+                table = table.set_column(i, name, rendered)
+        return table
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        logger.debug("DataFrame 转换为 Arrow 表失败: %s", e)
+        return None
+
+
+def write_csv(df: pd.DataFrame, path: Union[str, os.PathLike], columns: Optional[List[str]] = None, table=None):
+    """
+    写出 UTF-8-SIG 编码的 CSV（带 BOM，Excel 可直接打开中文）
+
+    安装了 pyarrow 时使用其 C++ 写出器；未安装或该表无法转换为 Arrow
+    （如混合类型的 object 列）时回退到 pandas.to_csv，输出列与表头一致。
+
+    Args:
+        df: 待写出的数据
+        path: 输出路径
+        columns: 只写出这些列（按给定顺序）
+        table: to_arrow_table(df) 的结果，传入时直接复用，不再重复转换
+    """
+    if table is None:
+        table = to_arrow_table(df if columns is None else df.loc[:, columns])
+    elif columns is not None:
+        table = table.select(columns)
+
+    if table is not None:
+        try:
+            with open(path, 'wb') as f:
+                f.write(UTF8_BOM)
+                pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=True))
+            return
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.debug("pyarrow 写出 %s 失败，回退到 pandas: %s", path, e)
+
+    (df if columns is None else df.loc[:, columns]).to_csv(path, index=False, encoding='utf-8-sig')
@@ -3,8 +3,9 @@
 """
 import akshare as ak
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time as dt_time
 import time
+import threading
 from typing import Optional, List, Dict
 import logging
 import random
@@ -14,29 +15,55 @@ try:
 except Exception:
     bs = None  # Optional dependency
 
+from src.data.cache_manager import CacheManager
+
 logger = logging.getLogger(__name__)
 
+# 日线历史缓存的刷新时点：9:30 开盘后进入新交易日；BaoStock 当日K线约 17:30 入库，18:00 后再刷新一次
+HISTORY_CACHE_REFRESH_TIMES = (dt_time(9, 30), dt_time(18, 0))
+# 缓存键已按刷新时段区分，最长的时段（18:00 至次日 9:30）不到 24 小时；
+# 超过这个年龄的文件只可能属于已过去的时段，读取时忽略，创建获取器时从磁盘删除
+HISTORY_CACHE_MAX_AGE_HOURS = 24
+
+
+def history_cache_bucket(now: datetime) -> str:
+    """返回 now 所处的日线缓存时段标识（最近一个已过的刷新时点，格式 YYYYMMDDHHMM）"""
+    for refresh_time in reversed(HISTORY_CACHE_REFRESH_TIMES):
+        if now.time() >= refresh_time:
+            return datetime.combine(now.date(), refresh_time).strftime("%Y%m%d%H%M")
+    last_time = HISTORY_CACHE_REFRESH_TIMES[-1]
+    return datetime.combine(now.date() - timedelta(days=1), last_time).strftime("%Y%m%d%H%M")
+
+
 class ShortTermDataFetcher:
     """短线策略专用数据获取器"""
     
-    def __init__(self, use_cache: bool = True, rate_limit: float = 0.5):
+    def __init__(self, use_cache: bool = True, rate_limit: float = 0.5, cache_dir: str = "cache"):
         """
         Args:
-            use_cache: 是否使用缓存
+            use_cache: 是否使用缓存（个股日线历史落盘，同一交易时段内重复运行直接读本地）
             rate_limit: 请求间隔（秒）
+            cache_dir: 磁盘缓存目录
         """
         self.use_cache = use_cache
+        self.cache = CacheManager(cache_dir) if use_cache else None
+        if self.cache is not None:
+            self.cache.prune("history_", max_age_hours=HISTORY_CACHE_MAX_AGE_HOURS)
         self.rate_limit = rate_limit
         self.last_request_time = 0
         self.bs_logged_in = False  # BaoStock 连接状态（用于连接复用）
+        # 多线程共用一个获取器时：速率控制全局串行；BaoStock 底层是单个全局 socket，查询必须串行
+        self._rate_lock = threading.Lock()
+        self._bs_lock = threading.RLock()
         
     def _rate_limit_check(self):
-        """简单的速率控制"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        if elapsed < self.rate_limit:
-            time.sleep(self.rate_limit - elapsed)
-        self.last_request_time = time.time()
+        """简单的速率控制（线程安全，多线程下保证全局请求间隔）"""
+        with self._rate_lock:
+            current_time = time.time()
+            elapsed = current_time - self.last_request_time
+            if elapsed < self.rate_limit:
+                time.sleep(self.rate_limit - elapsed)
+            self.last_request_time = time.time()
 
     def _sleep_backoff(self, attempt: int, base: float = 0.8, cap: float = 8.0) -> None:
         """指数退避（带抖动），用于网络/上游偶发断连."""
@@ -81,50 +108,52 @@ class ShortTermDataFetcher:
         """
         使用 BaoStock 获取日线（前复权由策略侧处理；这里提供原始日线/成交量）。
         返回列：open/high/low/close/volume/amount，index 为 datetime。
-        注意：使用连接复用，不会自动 logout（批量处理时更高效）
+        注意：使用连接复用，不会自动 logout（批量处理时更高效）；
+        BaoStock 会话不是线程安全的，登录+查询+读取结果在 _bs_lock 内串行执行
         """
-        if not self._ensure_bs_login():
-            return pd.DataFrame()
+        with self._bs_lock:
+            if not self._ensure_bs_login():
+                return pd.DataFrame()
 
-        bs_code = self._symbol_to_baostock_code(symbol)
-        # 注意：BaoStock 的 volume 通常是"手"，amount 是"元"
-        rs = bs.query_history_k_data_plus(
-            bs_code,
-            "date,open,high,low,close,volume,amount",
-            start_date=start_date,
-            end_date=end_date,
-            frequency="d",
-            adjustflag="2",  # 2: 不复权（更稳）；复权可在策略侧处理
-        )
-        if rs.error_code != "0":
-            # 如果是"用户未登录"错误，尝试重新登录并重试一次
-            if rs.error_code == "10001001":
-                logger.warning("BaoStock 连接失效，尝试重新登录...")
-                if self._ensure_bs_login(force_reconnect=True):
-                    # 重试查询
-                    rs = bs.query_history_k_data_plus(
-                        bs_code,
-                        "date,open,high,low,close,volume,amount",
-                        start_date=start_date,
-                        end_date=end_date,
-                        frequency="d",
-                        adjustflag="2",
-                    )
-                    if rs.error_code != "0":
-                        logger.warning("BaoStock 查询失败 %s (重试后): %s %s", symbol, rs.error_code, rs.error_msg)
+            bs_code = self._symbol_to_baostock_code(symbol)
+            # 注意：BaoStock 的 volume 通常是"手"，amount 是"元"
+            rs = bs.query_history_k_data_plus(
+                bs_code,
+                "date,open,high,low,close,volume,amount",
+                start_date=start_date,
+                end_date=end_date,
+                frequency="d",
+                adjustflag="2",  # 2: 不复权（更稳）；复权可在策略侧处理
+            )
+            if rs.error_code != "0":
+                # 如果是"用户未登录"错误，尝试重新登录并重试一次
+                if rs.error_code == "10001001":
+                    logger.warning("BaoStock 连接失效，尝试重新登录...")
+                    if self._ensure_bs_login(force_reconnect=True):
+                        # 重试查询
+                        rs = bs.query_history_k_data_plus(
+                            bs_code,
+                            "date,open,high,low,close,volume,amount",
+                            start_date=start_date,
+                            end_date=end_date,
+                            frequency="d",
+                            adjustflag="2",
+                        )
+                        if rs.error_code != "0":
+                            logger.warning("BaoStock 查询失败 %s (重试后): %s %s", symbol, rs.error_code, rs.error_msg)
+                            return pd.DataFrame()
+                    else:
+                        logger.warning("BaoStock 重新登录失败，无法查询 %s", symbol)
                         return pd.DataFrame()
                 else:
-                    logger.warning("BaoStock 重新登录失败，无法查询 %s", symbol)
+                    logger.warning("BaoStock 查询失败 %s: %s %s", symbol, rs.error_code, rs.error_msg)
                     return pd.DataFrame()
-            else:
-                logger.warning("BaoStock 查询失败 %s: %s %s", symbol, rs.error_code, rs.error_msg)
-                return pd.DataFrame()
 
-        rows = []
-        while rs.next():
-            rows.append(rs.get_row_data())
-        if not rows:
-            return pd.DataFrame()
+            rows = []
+            while rs.next():
+                rows.append(rs.get_row_data())
+            if not rows:
+                return pd.DataFrame()
 
         df = pd.DataFrame(rows, columns=[c.strip() for c in rs.fields])
         # 类型转换
@@ -144,7 +173,8 @@ class ShortTermDataFetcher:
         """
         if self.bs_logged_in and bs is not None:
             try:
-                bs.logout()
+                with self._bs_lock:
+                    bs.logout()
                 self.bs_logged_in = False
                 logger.info("BaoStock 连接已关闭")
             except Exception as e:
@@ -329,9 +359,16 @@ class ShortTermDataFetcher:
         说明：
         - 完全移除 AkShare，对你当前网络环境更友好
         - 只使用 BaoStock 获取日线数据（前复权）
+        - use_cache=True 时按 (symbol, period, 缓存时段) 落盘缓存，日线在同一时段内不变
         """
         # 计算日期范围
         end_dt = datetime.now()
+        cache_key = f"history_{symbol}_{period}_{history_cache_bucket(end_dt)}"
+        if self.cache is not None:
+            cached = self.cache.get(cache_key, max_age_hours=HISTORY_CACHE_MAX_AGE_HOURS)
+            if cached is not None and not cached.empty:
+                logger.debug("使用缓存的 %s 日线数据", symbol)
+                return cached.copy()
         if period == "6mo":
             start_dt = end_dt - timedelta(days=180)
         elif period == "3mo":
@@ -342,6 +379,7 @@ class ShortTermDataFetcher:
             start_dt = end_dt - timedelta(days=180)
 
         # 直接使用 BaoStock（日线，前复权）
+        self._rate_limit_check()
         try:
             bs_df = self._fetch_history_baostock(
                 symbol,
@@ -350,7 +388,10 @@ class ShortTermDataFetcher:
             )
             if bs_df is not None and not bs_df.empty and "close" in bs_df.columns and not bs_df["close"].isna().all():
                 logger.info("使用 BaoStock 获取 %s 成功（无 AkShare）", symbol)
-                return bs_df.sort_index().ffill().bfill()
+                hist_df = bs_df.sort_index().ffill().bfill()
+                if self.cache is not None:
+                    self.cache.set(cache_key, hist_df)
+                return hist_df
         except Exception as e:
             logger.warning("BaoStock 获取 %s 失败: %s", symbol, e)
 
@@ -0,0 +1,115 @@
+"""
+JSON 写出工具 - 优先使用 orjson
+
+两条路径写出的 JSON 相同：numpy 标量按数值写出，NaN/inf 写为 null，
+datetime 写为 ISO 格式，元组写为数组，其余无法序列化的对象写为 str(obj)。
+"""
+import os
+import json
+import math
+import functools
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # Optional dependency
+
+# JSON 原生标量：按精确类型判断（集合查找，比 isinstance 沿 MRO 逐个比较更快）；
+# float 不在其中，需要先把 NaN/inf 转为 null
+_JSON_SCALAR_TYPES = frozenset({int, str, bool, type(None)})
+
+
+def _finite_or_none(value: float):
+    return value if math.isfinite(value) else None  # 与 orjson 一致：NaN/inf 写为 null
+
+
+def make_serializable(obj):
+    """转换不可序列化的对象（递归处理 dict/list，标量直接返回）"""
+    obj_type = type(obj)
+    if obj_type in _JSON_SCALAR_TYPES:
+        return obj
+    if obj_type is float:
+        return _finite_or_none(obj)
+    if obj_type is dict:
+        values = obj.values()
+        if all(type(v) in _JSON_SCALAR_TYPES for v in values):
+            return dict(obj)  # 叶子字典：无需逐值递归
+        return {k: make_serializable(v) for k, v in obj.items()}
+    if obj_type is list:
+        return [make_serializable(v) for v in obj]
+    return _serialize_other(obj)
+
+
+@functools.singledispatch
+def _serialize_other(obj):
+    """非内置精确类型的兜底转换（按类型分派，子类如 np.float64 沿 MRO 命中）"""
+    return str(obj)
+
+
+@_serialize_other.register(int)
+@_serialize_other.register(str)
+def _(obj):
+    return obj
+
+
+@_serialize_other.register(float)
+def _(obj):
+    return _finite_or_none(obj)
+
+
+@_serialize_other.register(datetime)
+def _(obj):
+    return obj.isoformat()  # pd.Timestamp 是 datetime 子类
+
+
+@_serialize_other.register(pd.DataFrame)
+def _(obj):
+    return make_serializable(obj.to_dict('records'))
+
+
+@_serialize_other.register(dict)
+def _(obj):
+    return {k: make_serializable(v) for k, v in obj.items()}
+
+
+@_serialize_other.register(list)
+@_serialize_other.register(tuple)
+def _(obj):
+    return [make_serializable(v) for v in obj]  # 元组与 orjson 一致输出为数组
+
+
+@_serialize_other.register(np.ndarray)
+def _(obj):
+    return make_serializable(obj.tolist())
+
+
+@_serialize_other.register(np.generic)
+def _(obj):
+    return make_serializable(obj.item())  # np.int64 / np.bool_ 等转为 Python 标量，与 orjson 输出一致
+
+
+def write_json(obj: Any, path: Union[str, os.PathLike]):
+    """
+    写出缩进 2 格的 UTF-8 JSON（中文不转义）
+
+    安装了 orjson 时使用其原生实现（datetime / numpy 标量与数组直接处理，其余交给 _serialize_other）；
+    否则先 make_serializable 再交给标准库 json。
+    """
+    if orjson is not None:
+        payload = orjson.dumps(
+            obj,
+            default=_serialize_other,
+            option=orjson.OPT_INDENT_2
+            | orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATACLASS,  # dataclass 与 json 路径一样写为 str(obj)
+        )
+        with open(path, 'wb') as f:
+            f.write(payload)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_serializable(obj), f, ensure_ascii=False, indent=2)
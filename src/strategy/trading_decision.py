@@ -73,7 +73,7 @@ class ShortTermTradingDecision:
             buy_range_low = base_price * 0.99   # -1%
             buy_range_high = base_price * 1.02  # +2%
             
-            buy_signal['buy_price_range'] = (buy_range_low, buy_range_high)
+            buy_signal['buy_price_range'] = (float(buy_range_low), float(buy_range_high))
             buy_signal['position_size'] = params['position']  # 5-7%仓位
             buy_signal['holding_days'] = max(1, params['days'] - 1)   # 因为已有1天涨幅
             
@@ -85,7 +85,7 @@ class ShortTermTradingDecision:
             buy_range_low = base_price * 0.985   # -1.5%
             buy_range_high = base_price * 1.01   # +1%
             
-            buy_signal['buy_price_range'] = (buy_range_low, buy_range_high)
+            buy_signal['buy_price_range'] = (float(buy_range_low), float(buy_range_high))
             buy_signal['position_size'] = params['position'] * 0.7  # 减少仓位
             buy_signal['holding_days'] = params['days']
             
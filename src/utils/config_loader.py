@@ -0,0 +1,33 @@
+"""
+YAML 配置加载工具 - 各入口脚本共用
+"""
+import copy
+import functools
+import os
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader  # type: ignore
+except ImportError:
+    from yaml import SafeLoader as YamlLoader  # 未编译 libyaml 时回退到纯 Python 解析器
+
+
+@functools.lru_cache(maxsize=4)
+def _load_yaml_cached(path: str, mtime: float) -> Any:
+    """按 (路径, 修改时间) 缓存解析结果，文件被修改后 mtime 变化即重新解析"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+def load_yaml(path: str) -> Any:
+    """
+    加载 YAML 文件（返回副本，调用方修改不会污染缓存）
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        yaml.YAMLError: 文件解析失败
+    """
+    path = os.path.abspath(path)
+    return copy.deepcopy(_load_yaml_cached(path, os.path.getmtime(path)))
@@ -0,0 +1,20 @@
+"""
+数值内核的可选 numba 编译 - 各分析模块共用
+"""
+try:
+    from numba import njit  # type: ignore
+except Exception:
+    njit = None  # Optional dependency
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def jit(func):
+    """
+    安装了 numba 时编译为机器码（带磁盘缓存），否则原样返回、按纯 Python 执行
+
+    编译后的函数可通过 .py_func 取得原始 Python 实现，用于核对两条路径的结果。
+    """
+    if njit is None:
+        return func
+    return njit(cache=True)(func)
@@ -0,0 +1,23 @@
+"""
+结果文件查找工具 - 各分析脚本读取最近一次盘前推荐时共用
+"""
+import os
+import re
+from typing import Optional
+
+# 推荐股票文件名模式（recommended_stocks_*.csv / stocks_simple_*.csv / simple_recommendations_*.csv / recommendations_*.csv）
+WATCHLIST_FILE_PATTERN = re.compile(
+    r'^(recommended_stocks|stocks_simple|simple_recommendations|recommendations)_.*\.csv$'
+)
+
+
+def find_latest_watchlist_file(results_dir: str) -> Optional[str]:
+    """单次 scandir 遍历结果目录，返回创建时间最新的推荐股票文件路径（没有则返回 None）"""
+    best_ctime, best_path = None, None
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if WATCHLIST_FILE_PATTERN.match(entry.name) and entry.is_file():
+                ctime = entry.stat().st_ctime
+                if best_ctime is None or ctime > best_ctime:
+                    best_ctime, best_path = ctime, entry.path
+    return best_path
@@ -0,0 +1,77 @@
+"""
+脚本运行工具 - 快捷脚本调用其他入口脚本时共用
+"""
+import importlib
+import os
+import subprocess
+import sys
+from typing import List
+
+
+def run_in_process(module, argv: List[str]) -> bool:
+    """
+    调用已导入脚本模块的 main()
+
+    Args:
+        module: 脚本模块
+        argv: 执行期间使用的 sys.argv，结束后恢复
+
+    Returns:
+        是否成功（main() 正常返回或以 0 退出）
+    """
+    saved_argv = sys.argv
+    sys.argv = list(argv)
+    try:
+        module.main()
+    except SystemExit as e:
+        return e.code in (None, 0)
+    finally:
+        sys.argv = saved_argv
+    return True
+
+
+def run_in_subprocess(script_path: str, args: List[str]) -> bool:
+    """在子进程中运行脚本，逐行转发输出（不在内存中累积全部输出）"""
+    try:
+        with subprocess.Popen([sys.executable, script_path, *args], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True, encoding='utf-8', bufsize=1) as proc:
+            for line in proc.stdout:
+                sys.stdout.write(line)
+        return proc.returncode == 0
+    except Exception as e:
+        print(f"❌ 运行失败: {e}")
+        return False
+
+
+def run_script(script_path: str, args: List[str]) -> bool:
+    """
+    运行入口脚本的 main()
+
+    优先在当前进程内导入运行，复用已加载的 pandas/akshare 等模块，省去解释器冷启动；
+    只有导入脚本模块本身失败（ImportError）时才改用子进程，main() 内部抛出的异常不会触发重跑。
+
+    Args:
+        script_path: 脚本路径
+        args: 传给脚本的命令行参数（不含脚本名）
+
+    Returns:
+        是否成功
+    """
+    script_dir, filename = os.path.split(os.path.abspath(script_path))
+    module_name = os.path.splitext(filename)[0]
+    try:
+        if script_dir not in sys.path:
+            sys.path.insert(0, script_dir)
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        print(f"⚠️  无法在当前进程加载 {module_name}（{e}），改用子进程运行")
+        return run_in_subprocess(script_path, args)
+    except Exception as e:
+        print(f"❌ 运行失败: {e}")
+        return False
+
+    try:
+        return run_in_process(module, [filename, *args])
+    except Exception as e:
+        print(f"❌ 运行失败: {e}")
+        return False
@@ -0,0 +1,121 @@
+"""
+数值内核测试：numba 编译版与纯 Python 版的结果一致
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from src.utils.jit import NUMBA_AVAILABLE
+
+
+def _python(kernel):
+    """内核的纯 Python 实现（未安装 numba 时就是内核本身）"""
+    return getattr(kernel, 'py_func', kernel)
+
+
+def _assert_same(compiled, python):
+    """
+    逐项比较两条路径的输出（标量、数组或它们组成的元组），NaN 视为相等
+
+    整数（分档、计数）必须完全相同；浮点数允许末位差异（numba 的 log10 等数学函数与 NumPy 可能差 1 ulp）
+    """
+    if isinstance(compiled, tuple):
+        assert isinstance(python, tuple) and len(compiled) == len(python)
+        for c, p in zip(compiled, python):
+            _assert_same(c, p)
+        return
+    compiled, python = np.asarray(compiled), np.asarray(python)
+    if np.issubdtype(compiled.dtype, np.floating) or np.issubdtype(python.dtype, np.floating):
+        np.testing.assert_allclose(compiled, python, rtol=1e-12, atol=0)
+    else:
+        np.testing.assert_array_equal(compiled, python)
+
+
+def test_trend_score_kernels():
+    """测试个股趋势评分内核（analyze_stock_trends）"""
+    print("🧪 测试趋势评分内核...")
+    from analyze_stock_trends import trend_score_batch, trend_score_kernel
+
+    rng = np.random.default_rng(0)
+    n = 500
+    price = rng.uniform(5, 50, n)
+    ma5, ma10, ma20 = (price * rng.uniform(0.9, 1.1, n) for _ in range(3))
+    mom5 = rng.normal(0, 8, n)
+    vol_code = rng.integers(-1, 2, n)
+    volatility = rng.uniform(10, 60, n)
+    args = (price, ma5, ma10, ma20, mom5, vol_code, volatility)
+
+    kernel = _python(trend_score_kernel)
+    python_rows = [kernel(*(a[i] for a in args)) for i in range(n)]
+    expected = (np.array([r[0] for r in python_rows]), np.array([r[1] for r in python_rows]))
+    _assert_same(trend_score_batch(*args), expected)
+    _assert_same(_python(trend_score_batch)(*args), expected)
+    print("✅ 趋势评分内核一致")
+
+
+def test_time_pattern_kernels():
+    """测试分时段评分内核（time_pattern_analyzer）"""
+    print("🧪 测试分时段评分内核...")
+    from src.analyzer.time_pattern_analyzer import (
+        daily_score_batch, morning_score_batch, opening_score_batch
+    )
+
+    rng = np.random.default_rng(1)
+    n = 500
+    length = rng.integers(1, 30, n)
+    last = rng.uniform(5, 50, n)
+    ma = last * rng.uniform(0.9, 1.1, n)
+    change = rng.normal(0, 4, n)
+
+    for kernel in (opening_score_batch, morning_score_batch, daily_score_batch):
+        _assert_same(kernel(length, last, change, ma), _python(kernel)(length, last, change, ma))
+    print("✅ 分时段评分内核一致")
+
+
+def test_sector_score_kernel():
+    """测试板块评分内核（dynamic_sector_analyzer_v2）"""
+    print("🧪 测试板块评分内核...")
+    from src.core.dynamic_sector_analyzer_v2 import sector_score_batch
+
+    rng = np.random.default_rng(2)
+    n = 300
+    linear = np.column_stack([rng.normal(0, 4, n), rng.uniform(0, 100, n), rng.uniform(0, 10, n)])
+    market_cap = rng.uniform(10, 1e5, n)
+    leader_change = rng.normal(3, 5, n)
+    weights = np.array([0.35, 0.25, 0.20, 0.20])
+    risk_mul = rng.choice([0.8, 1.0, 1.1], n)
+    empty = np.empty(0)
+
+    # 市值/领涨股涨幅两列齐全与缺失（空数组）的情形都要覆盖
+    for cap, leader in ((market_cap, leader_change), (empty, leader_change), (market_cap, empty), (empty, empty)):
+        args = (linear, cap, leader, weights, risk_mul)
+        _assert_same(sector_score_batch(*args), _python(sector_score_batch)(*args))
+    print("✅ 板块评分内核一致")
+
+
+def test_change_stats_kernel():
+    """测试板块涨跌幅统计内核（market_analyzer）：编译版、纯 Python 循环和 NumPy 实现三者一致"""
+    print("🧪 测试板块涨跌幅统计内核...")
+    from src.core.market_analyzer import _change_stats_loop, _change_stats_numpy, change_stats_batch
+
+    rng = np.random.default_rng(3)
+    for n in (0, 1, 4, 5, 6, 30, 200):
+        changes = np.round(rng.normal(0, 3, n), 2)
+        changes[rng.random(n) < 0.1] = np.nan
+        expected = _change_stats_loop(changes)
+        _assert_same(change_stats_batch(changes), expected)
+        _assert_same(_change_stats_numpy(changes), expected)
+    print("✅ 板块涨跌幅统计内核一致")
+
+
+def main():
+    print(f"numba: {'已安装' if NUMBA_AVAILABLE else '未安装（只运行纯 Python 路径）'}")
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+JSON 写出测试：orjson 与标准库 json 两条路径写出的内容一致
+"""
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import src.data.json_writer as json_writer
+
+
+@dataclasses.dataclass
+class _Decision:
+    action: str = "buy"
+
+
+def _write(payload, use_orjson: bool) -> str:
+    """按指定路径写出 payload，返回文件内容"""
+    saved = json_writer.orjson
+    if not use_orjson:
+        json_writer.orjson = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.json")
+            json_writer.write_json(payload, path)
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+    finally:
+        json_writer.orjson = saved
+
+
+def test_json_writer():
+    """测试两条路径输出一致"""
+    print("🧪 测试 JSON 写出...")
+
+    payload = {
+        "instructions": {
+            "immediate_buy": [{
+                "symbol": "000001",
+                "name": "平安银行",
+                "price": np.float64(10.5),
+                "volume": np.int64(3),
+                "limit_up": np.bool_(True),
+                "change_pct": float("nan"),
+                "score": np.float64("nan"),
+                "ratio": float("inf"),
+                "time": datetime(2026, 1, 2, 9, 30, 1, 500),
+                "bar_time": pd.Timestamp("2026-01-02 09:30"),
+                "trade_date": date(2026, 1, 2),
+                "buy_price_range": (9.8, np.float64(10.2)),
+                "closes": np.array([1.0, np.nan]),
+                "decision": _Decision(),
+                "levels": {1: "一档"},
+                "history": pd.DataFrame({"close": [1.0, np.nan]}),
+            }],
+        },
+        "monitor_results": {"count": 1, "rate": 0.5, "note": None},
+    }
+
+    python_text = _write(payload, use_orjson=False)
+    data = json.loads(python_text)
+    row = data["instructions"]["immediate_buy"][0]
+    assert row["price"] == 10.5 and row["volume"] == 3 and row["limit_up"] is True
+    assert row["change_pct"] is None and row["score"] is None and row["ratio"] is None
+    assert row["buy_price_range"] == [9.8, 10.2]
+    assert row["closes"] == [1.0, None]
+    assert row["history"] == [{"close": 1.0}, {"close": None}]
+
+    if json_writer.orjson is None:
+        print("⚠️  未安装 orjson，只检查标准库路径")
+    else:
+        assert _write(payload, use_orjson=True) == python_text
+    print("✅ JSON 写出一致")
+
+
+if __name__ == "__main__":
+    test_json_writer()
@@ -0,0 +1,51 @@
+"""
+买入区间解析测试（monitor_open_market.load_pre_market_analysis）
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from monitor_open_market import load_pre_market_analysis
+
+
+def _load_ranges(cells):
+    """把买入区间文本写进临时的盘前分析 CSV，读回解析后的 buy_price_range"""
+    with tempfile.TemporaryDirectory() as results_dir:
+        pd.DataFrame({
+            "symbol": [f"00000{i}" for i in range(1, len(cells) + 1)],
+            "name": "测试",
+            "total_score": 80.0,
+            "price": 10.0,
+            "buy_buy_price_range": cells,
+        }).to_csv(os.path.join(results_dir, "recommended_stocks_test.csv"), index=False, encoding="utf-8-sig")
+        result = load_pre_market_analysis(results_dir)
+    return result["recommended_stocks_df"]["buy_price_range"].tolist()
+
+
+def test_price_range():
+    """测试买入区间解析"""
+    print("🧪 测试买入区间解析...")
+
+    ranges = _load_ranges([
+        "(9.8, 10.2)",
+        "(np.float64(9.8), np.float64(10.2))",  # NumPy 2 的 repr
+        "(np.float64(9), np.float64(10))",
+        "10.5",
+        "",
+    ])
+    print(ranges)
+
+    assert ranges[0] == (9.8, 10.2)
+    assert ranges[1] == (9.8, 10.2)
+    assert ranges[2] == (9.0, 10.0)
+    assert ranges[3] == (10.5, 10.5)
+    assert ranges[4] == (0.0, 0.0)
+
+    print("✅ 买入区间解析正确")
+
+
+if __name__ == "__main__":
+    test_price_range()